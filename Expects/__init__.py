@@ -1,494 +1,900 @@
 from __future__ import absolute_import
-from typing import List, Optional, Dict, Mapping, Tuple, cast, Set, Callable
+from typing import TYPE_CHECKING, Any, List, Optional, Dict, Mapping, Pattern, Sequence, Tuple, Union, cast, Set, Callable
 import os
 import re
 import json
-import inspect
-import difflib
-from cmd import Cmd
-import sys
+import random
+import hashlib
+import stat
+import tempfile
+import time
 from numbers import Number
-from . import substrings
+from .fields import MISSING, field_value
 from robot.api import logger # type: ignore
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError # type: ignore
+# Subsystems are imported when first used, most of them only by some modes and expectations
+if TYPE_CHECKING:
+    from .blobs import BlobStore
+    from .digests import ValueDigest
+    from .journal import Journal
+    from .paths import PathTree
+    from .shards import ShardStore
+    from .substrings import GapPattern
+    from .shared import SharedKeywords
+    from .timing import Timings
 
 class Expects:
 
     ROBOT_LIBRARY_SCOPE = 'TEST SUITE'
     ROBOT_LISTENER_API_VERSION = 2
 
-    def __init__(self, mode:str='NORMAL') -> None:
-        '''mode can be NORMAL, INTERACTIVE or TRAINING
+    def __init__(self, mode:str='NORMAL', compact:bool=False, max_log_length:int=1000, examples:str='ALL',
+                 blob_threshold:int=0, compress_blobs:bool=False, digest_threshold:int=0, journal:bool=False,
+                 keyword_listener:bool=True, timing:int=0, tolerance:str='', sharded:bool=False,
+                 shared_keywords:str='') -> None:
+        '''mode can be NORMAL, INTERACTIVE, TRAINING or RECORD
         NORMAL = validate results against expectations
         INTERACTIVE = pause execution on validation failure and allow changes to validation criteria.
         TRAINING = store all values as expectations
+        RECORD = only write all values to a journal. Train with them afterwards with expects-train.
+
+        compact = write expectations file without indentation
+        max_log_length = longer values are shortened in log messages, 0 logs values as is
+        examples = which trained string values are kept as examples: ALL, NONE, LATEST:<n> or RESERVOIR:<n>
+        blob_threshold = strings longer than this are stored in a directory next to the expectations file, 0 = never
+        compress_blobs = compress stored strings with zlib
+        digest_threshold = strings longer than this are expected by size and sha256 only, 0 = never
+        journal = write trained values to a journal of this process instead of the expectations file.
+                  For parallel runs. Merge the journals to the expectations file with expects-merge.
+        keyword_listener = track keyword positions for expectation ids. Without it every check needs an id
+                  and Robot does not call the library for each keyword.
+        timing = record time and value bytes per expectation. Writes them to yoursuite_expects.timing.json
+                  and logs the given number of most expensive expectations. 0 = off
+        tolerance = train numbers into a summary and expect them within a band of it instead of
+                  between min and max: <k>sigma for mean ± k·σ or p<low>-p<high> for percentiles, e.g. p1-p99
+        sharded = store expectations as a file per test and keyword in yoursuite_expects.shards and
+                  load and write only the ones that are used. Convert existing files with expects-shards.
+        shared_keywords = store expectations of keywords in resource files in this directory by the source
+                  and name of the keyword, shared by all suites. Written once when the run ends.
         '''
-        self.ROBOT_LIBRARY_LISTENER = self
+        self.ROBOT_LIBRARY_LISTENER = self if keyword_listener else _SuiteListener(self)
+        self._keyword_listener = keyword_listener
+        self._timing_top = timing
+        self._timings:Optional['Timings'] = None
         self.filename:str
+        # Created only with a threshold or when blobs were stored before
+        self._blobs:Optional['BlobStore'] = None
+        self._blob_threshold = blob_threshold
+        self._compress_blobs = compress_blobs
+        self._digest_threshold = digest_threshold
+        self._use_journal = journal
+        self._journal:Optional['Journal'] = None
+        self._sharded = sharded
+        self._shards:Optional['ShardStore'] = None
+        # Tests and keywords with changed expectations, written back when sharded
+        self._changed:Set[Tuple[str, str]] = set()
+        self._location:Tuple[str, str] = ("Tests", "UNKNOWN")
+        if journal and mode == 'INTERACTIVE':
+            raise ValueError("journal=True can not be used in INTERACTIVE mode, changes made there would not be journaled")
+        # Settings that expects-merge and expects-train use when training with the journals
+        self._journal_settings:Dict[str, object] = {'compact':compact, 'examples':examples, 'blob_threshold':blob_threshold,
+                                                    'compress_blobs':compress_blobs, 'tolerance':tolerance}
+        self._shared:Optional['SharedKeywords'] = None
+        if shared_keywords:
+            if journal or mode == 'RECORD':
+                raise ValueError("shared_keywords can not be used with journal=True or RECORD mode")
+            from . import shared
+            self._shared = shared.open_store(shared_keywords, lambda path, data: _write_json_atomically(path, data, self._compact))
+        # Sources of resource files by resource name, None for libraries
+        self._resources:Dict[str, Optional[str]] = {}
+        # Source and name of the current keyword when it is shared and of the keyword of the current check
+        self._shared_keyword:Optional[Tuple[str, str]] = None
+        self._shared_key:Optional[Tuple[str, str]] = None
+        # Whether each started keyword is a user keyword, so its end needs no lookup
+        self._user_keywords:List[bool] = []
         self.expectations:Dict[str, Dict[str, List[Dict[str, object]]]] = {"Tests":{}, "Keywords":{}}
-        self._position:List[str] = []
+        self._index:Dict[str, Dict[str, Dict[str, Dict[str, object]]]] = {"Tests":{}, "Keywords":{}}
+        # Names of the test and user keywords, each followed by row indexes of the library keywords below it
+        self._position:List[Union[str, int]] = []
         self._row_index:int = 0
         self._mode = mode
+        self._compact = compact
+        self._dirty = False
+        self._examples = ExampleRetention(examples)
+        if tolerance:
+            from .summary import parse_band
+            parse_band(tolerance)
+        self._tolerance = tolerance
+        self._matchers:Dict[int, Matcher] = {}
+        self._max_log_length = max_log_length or None
+        self._debug = _Log(logger.debug, 'DEBUG', self._max_log_length)
+        self._console = _Log(logger.console, None, self._max_log_length)
+        self._info = _Log(logger.info, 'INFO', self._max_log_length)
+        self._validator = Validator(self._info)
+        self._console_validator = Validator(self._console)
         self._expectation_index = 0
         self._current_test:str = "UNKNOWN"
         self._current_keyword:str = "UNKNOWN"
 
     def _start_test(self, name:str, attrs:Mapping[str, str]) -> None:
+        self._read_log_level()
         self._position.append(name)
         self._current_test = name
         self._expectation_index = 0
         self._row_index = 0
 
     def _end_test(self, name:str, attributes) -> None:
-        self._position = self._position[:-1] if len(self._position) > 1 else [attributes["longname"][:-len(name)-1]]
+        if len(self._position) > 1:
+            self._position.pop()
+        else:
+            self._position = [attributes["longname"][:-len(name)-1]]
         self._current_test = "UNKNOWN"
 
     def _start_keyword(self, name:str, attrs:Mapping[str, str]) -> None:
-        if attrs['libname'] == '' and attrs['type'] == 'Keyword':
-            self._current_keyword = name
-            self._position.append(name)
+        source = self._shared_source(attrs)
+        user_keyword = attrs['libname'] == '' or source is not None
+        self._user_keywords.append(user_keyword)
+        if user_keyword and attrs['type'] == 'Keyword':
+            # Keywords of resource files are known by their name without the resource name
+            self._current_keyword = name if source is None else attrs['kwname']
+            self._shared_keyword = None if source is None else (source, self._current_keyword)
+            self._position.append(self._current_keyword)
         elif not(self._position):
-            self._position = ['0', '0.' + str(self._row_index)]
+            self._position = ['0', self._row_index]
         else:
-            self._position.append(self._position[-1] + "." + str(self._row_index))
+            self._position.append(self._row_index)
         self._row_index = 0
 
     def _end_keyword(self, name:str, attrs:Mapping[str, str]) -> None:
-        if attrs['libname'] == '':
+        # Import Library ends a keyword that started before the listener did
+        user_keyword = self._user_keywords.pop() if self._user_keywords else attrs['libname'] == ''
+        if user_keyword:
             self._current_keyword = "UNKNOWN"
+            self._shared_keyword = None
+        elif name == 'BuiltIn.Set Log Level':
+            self._read_log_level()
         if not(self._position):
             self._row_index = 1
             self._position = ['0']
             return
-        splitted = self._position[-1].split(".")
-        self._row_index = int(splitted[-1]) if len(splitted) > 1 else 0
-        self._row_index += 1
-        self._position = self._position[:-1] if len(self._position) > 1 else [str(int(splitted[0])+1)]
+        last = self._position[-1]
+        if isinstance(last, int):
+            self._row_index = last + 1
+        else:
+            self._row_index = (int(last.rsplit(".", 1)[1]) if "." in last else 0) + 1
+        if len(self._position) > 1:
+            self._position.pop()
+        else:
+            self._position = [str(int(str(last).split(".")[0])+1)]
+
+    def _shared_source(self, attrs:Mapping[str, str]) -> Optional[str]:
+        '''Source of a keyword from a resource file when keyword expectations are shared.'''
+        libname = attrs['libname']
+        if self._shared is None or not libname:
+            return None
+        if libname not in self._resources:
+            try:
+                BuiltIn().get_library_instance(libname)
+                self._resources[libname] = None
+            except RuntimeError:
+                from .shared import source_name
+                self._resources[libname] = source_name(self._shared.directory, attrs.get('source'), libname)
+        return self._resources[libname]
+
+    def _position_id(self) -> str:
+        '''Dotted id of the current position, like "Test 1.4.0.2".'''
+        rows:List[str] = []
+        for item in reversed(self._position):
+            if isinstance(item, str):
+                return ".".join([item] + rows[::-1])
+            rows.append(str(item))
+        raise AssertionError("No position")
 
     def _start_suite(self, name:str, attrs:Mapping[str, str]) -> None:
+        self._read_log_level()
         filename, _ = os.path.splitext(attrs['source'])
-        self.filename = filename + "_expects.json"
-        if os.path.isfile(self.filename):
-            with open(self.filename, "r") as f:
-                self.expectations = json.load(f)
+        self._load(filename + "_expects.json")
 
-    def _end_suite(self, name:str, attrs:Mapping[str, str]) -> None:
-        with open(self.filename, "w") as f:
-            json.dump(self.expectations, f, indent=2, sort_keys=True)
+    def _read_log_level(self) -> None:
+        '''Log level is read once per suite and test and after Set Log Level instead of on every logged message.'''
+        level = _log_level()
+        self._debug.set_level(level)
+        self._info.set_level(level)
 
-    def _find_expected(self, expectation_id:str, current_expectations:List[Dict[str, object]]) -> Optional[Dict[str, object]]:
-        for exp in current_expectations:
-            if exp['id'] == expectation_id:
-                return exp
+    def _end_suite(self, name:str, attrs:Mapping[str, str]) -> None:
+        if self._journal is not None:
+            self._journal.close()
+        elif self._dirty:
+            self._save()
+        if self._timings is not None:
+            self._report_timings()
+
+    def _report_timings(self) -> None:
+        timings = cast('Timings', self._timings)
+        base, _ = os.path.splitext(self.filename)
+        _write_json_atomically(base + ".timing.json", timings.report(), False)
+        logger.info(f"Most expensive expectations:\n{timings.table(self._timing_top)}", also_console=True)
+
+    def _load(self, filename:str) -> None:
+        self.filename = filename
+        base, _ = os.path.splitext(filename)
+        blobs_directory = base + ".blobs"
+        if self._blob_threshold or os.path.isdir(blobs_directory):
+            from .blobs import BlobStore
+            self._blobs = BlobStore(blobs_directory, self._blob_threshold, self._compress_blobs)
+        if self._timing_top:
+            from .timing import Timings
+            self._timings = Timings()
+        if self._use_journal or self._mode == 'RECORD':
+            from . import journal
+            self._journal = journal.Journal(journal.directory_for(filename), self._blobs, self._journal_settings)
+        if self._sharded:
+            from . import shards
+            self._shards = shards.ShardStore(shards.directory_for(filename), lambda path, data: _write_json_atomically(path, data, self._compact))
+            if not self._shards.exists() and os.path.isfile(self.filename):
+                logger.warn(f"Expectations in {self.filename} are not used when sharded. Convert them with expects-shards split.")
+        elif os.path.isfile(self.filename):
+            with open(self.filename, "r") as f:
+                self.expectations = json.load(f)
+        self._index = {section:{name:_index_by_id(exps) for name, exps in self.expectations[section].items()}
+                       for section in self.expectations}
+        for section in self.expectations.values():
+            for exps in section.values():
+                self._compile(exps)
+
+    def _compile(self, expectations:List[Dict[str, object]]) -> None:
+        for exp in expectations:
+            try:
+                self._matcher(exp)
+            except (re.error, TypeError, ValueError):
+                pass  # Reported when the expectation is validated
+
+    def _load_shard(self, section:str, name:str) -> None:
+        exps = cast('ShardStore', self._shards).load(section, name)
+        if exps is not None:
+            self.expectations[section][name] = exps
+            self._index[section][name] = _index_by_id(exps)
+            self._compile(exps)
+
+    def _save(self) -> None:
+        referenced = self._blobs.externalize(self.expectations) if self._blobs is not None else set()
+        if self._shards is not None:
+            # Unloaded shards may refer to other blobs, expects-merge prunes them
+            self._shards.save(self.expectations, self._changed)
+        else:
+            _write_json_atomically(self.filename, self.expectations, self._compact)
+            if self._blobs is not None:
+                from . import journal
+                if not journal.journal_files(journal.directory_for(self.filename)):
+                    self._blobs.prune(referenced)  # Journals not merged yet may refer to other blobs
+        self._changed.clear()
+        self._dirty = False
+
+    def _materialize(self, expected:Dict[str, object]) -> Set[str]:
+        '''Replaces blob references of expected with the stored strings before it is changed.'''
+        return self._blobs.materialize(expected) if self._blobs is not None else set()
+
+    def _unexpected(self, value:object) -> str:
+        return f"Unexpected {_shorten(value, self._max_log_length, digest=True)}"
+
+    def _expectation_changed(self, expected:Dict[str, object]) -> None:
+        if self._shared_key is not None:
+            cast('SharedKeywords', self._shared).changed(*self._shared_key)
+        else:
+            self._dirty = True
+            self._changed.add(self._location)
+        self._matchers.pop(id(expected), None)
+
+    def _matcher(self, expected:Dict[str, object]) -> 'Matcher':
+        matcher = self._matchers.get(id(expected))
+        if matcher is None or matcher.expected is not expected:
+            matcher = self._matchers[id(expected)] = Matcher(expected, self._blobs)
+        return matcher
+
+    def _find_expected(self, expectation_id:str, current_expectations:List[Dict[str, object]],
+                       index:Dict[str, Dict[str, object]]) -> Optional[Dict[str, object]]:
+        if expectation_id in index:
+            return index[expectation_id]
         if len(current_expectations) < self._expectation_index:
             return None
         return current_expectations[self._expectation_index-1]
 
-    def should_be_as_expected(self, value:object, id:Optional[str]=None, training:bool=False) -> None:
-        expectation_id:str = id if id else self._position[-1]
+    def should_be_as_expected(self, value:object, id:Optional[str]=None, training:bool=False, digest:bool=False) -> None:
+        '''Validates value against the expectation with id or with the position of this keyword call.
+
+        With digest=True only size and sha256 of the value are expected. This is always done for bytes,
+        file like objects, iterators of bytes or string chunks and for expectations that already have
+        a digest. File like objects and iterators are read in chunks.
+        '''
+        expectation_id, section, name, current_expectations, index, expected = self._locate(id)
         mode:str = 'TRAINING' if training else self._mode
-        if self._current_keyword == 'UNKNOWN':
-            expectations = self.expectations["Tests"]
-            if self._current_test not in expectations:
-                expectations[self._current_test] = []
-        else:
-            expectations = self.expectations["Keywords"]
-            if self._current_keyword not in expectations:
-                expectations[self._current_keyword] = []
-        current_expectations = expectations[self._current_keyword if self._current_keyword != 'UNKNOWN' else self._current_test]
-        self._expectation_index += 1
-        expected = self._find_expected(expectation_id, current_expectations)
+        trained = False
+        timings = self._timings
+        digested = bool(digest or (expected is not None and 'sha256' in expected) or
+                        (self._digest_threshold and isinstance(value, str) and len(value) > self._digest_threshold))
+        if digested or type(value) not in _UNDIGESTED_TYPES:
+            from . import digests
+            if not isinstance(value, digests.ValueDigest) and (digested or digests.is_bytes_like(value) or digests.is_stream(value)):
+                value = digests.ValueDigest.of(value)
+        if mode == 'RECORD' and self._journal is not None:
+            self._journal.record(section, name, expectation_id, self._expectation_index, value)
+            return
         if expected is None:
             if mode == 'NORMAL':
-                raise AssertionError(f"Unexpected {value}")
+                raise AssertionError(self._unexpected(value))
             expected = {'id':expectation_id}
             current_expectations.append(expected)
-            ExpectationResolver(value, expected).resolve()
+            index.setdefault(expectation_id, expected)
+            if timings is not None:
+                start = time.perf_counter()
+            self._resolve(value, expected)
+            if timings is not None:
+                timings.add((section, name, expectation_id), 'resolve', start, value)
+            self._expectation_changed(expected)
+            trained = True
+        elif mode == 'TRAINING' and _summarizes(expected, value):
+            # Every trained number is added to the summary, also the ones that are within the band
+            self._debug("Adding {} to the summary of trained numbers", value)
+            if timings is not None:
+                start = time.perf_counter()
+            self._resolve(value, expected)
+            if timings is not None:
+                timings.add((section, name, expectation_id), 'resolve', start, value)
+            self._expectation_changed(expected)
+            trained = True
+            self._update_id(expected, expectation_id, index)
         else:
-            logger.debug(f"Validating that value '{value}' matches expectation")
-            if not Validator(logger.info).validate(value, expected):
+            self._debug("Validating that value '{}' matches expectation", value)
+            if timings is not None:
+                start = time.perf_counter()
+            valid = self._validator.validate(value, self._matcher(expected))
+            if timings is not None:
+                timings.add((section, name, expectation_id), 'validate', start, value)
+            if not valid:
                 if mode == 'INTERACTIVE':
                     logger.console(f"\nExecution paused on row with id '{expectation_id}'")
-                    NotMatchingValueInspector(value, expectation_id, current_expectations).cmdloop()
-                    if not Validator(logger.console).validate(value, expected):
-                        raise AssertionError(f"Unexpected {value}")
+                    self._materialize(expected)
+                    if timings is not None:
+                        start = time.perf_counter()
+                    self._inspect(value, expectation_id, current_expectations)
+                    if timings is not None:
+                        timings.add((section, name, expectation_id), 'inspect', start, value)
+                    self._expectation_changed(expected)
+                    if not self._console_validator.validate(value, self._matcher(expected)):
+                        raise AssertionError(self._unexpected(value))
                 elif mode == 'TRAINING':
-                    logger.console(f"\nUnexpected {value} - updating expectations")
-                    ExpectationResolver(value, expected).resolve()
-                    if not Validator(logger.console).validate(value, expected):
-                        raise AssertionError(f"Unexpected {value}")
+                    self._console("\nUnexpected {} - updating expectations", value)
+                    self._materialize(expected)
+                    if timings is not None:
+                        start = time.perf_counter()
+                    self._resolve(value, expected)
+                    if timings is not None:
+                        timings.add((section, name, expectation_id), 'resolve', start, value)
+                    self._expectation_changed(expected)
+                    trained = True
+                    if not self._console_validator.validate(value, self._matcher(expected)):
+                        raise AssertionError(self._unexpected(value))
                     else:
                         logger.console(f"resolved expectations")
                 else:
-                    raise AssertionError(f"Unexpected {value}")
-            logger.info(f"Value '{value}' matches expectations")
-            if expected['id'] != expectation_id:
-                if expected.get('expectId', False):
-                    raise AssertionError(f"Unexpected actual id {expectation_id} != {expected['id']}")
-                logger.debug(f"Expectation id mismatch. Expected '{expected['id']}' and was '{expectation_id}'. Updating expectation id.")
-                expected['id'] = expectation_id
-
-def _is_jsonable(x:object) -> bool:
-    try:
-        json.dumps(x)
+                    raise AssertionError(self._unexpected(value))
+            self._info("Value '{}' matches expectations", value)
+            trained = self._update_id(expected, expectation_id, index) or trained
+        if trained and self._journal is not None:
+            self._journal.record(section, name, expectation_id, self._expectation_index, value)
+
+    def should_be_as_expected_batch(self, values:object, id:Optional[str]=None, training:bool=False, sample:int=1,
+                                    allow_empty:bool=False) -> None:
+        '''Validates all values of a list or other iterable against one expectation.
+
+        Numbers are checked against min and max at once, with NumPy when it is installed.
+        With sample=n only every nth value is validated or trained with.
+        Fails when there are no values unless allow_empty=True.
+        '''
+        expectation_id, section, name, current_expectations, index, expected = self._locate(id)
+        mode:str = 'TRAINING' if training else self._mode
+        from . import batch
+        sampled, count = batch.sample(values, sample)
+        self._info("Checking {} of {} values", len(sampled), count)
+        if not len(sampled):
+            if allow_empty:
+                return
+            raise AssertionError("No values to check")
+        if mode == 'RECORD' and self._journal is not None:
+            for value in batch.as_list(sampled):
+                self._journal.record(section, name, expectation_id, self._expectation_index, value)
+            return
+        trained = False
+        timings = self._timings
+        key = (section, name, expectation_id)
+        if expected is None:
+            if mode == 'NORMAL':
+                raise AssertionError(self._unexpected(sampled[0]))
+            expected = {'id':expectation_id}
+            current_expectations.append(expected)
+            index.setdefault(expectation_id, expected)
+            if timings is not None:
+                start = time.perf_counter()
+            first, *rest = batch.as_list(sampled)
+            self._resolve(first, expected)
+            if rest:
+                self._resolve_batch(rest, expected)
+            if timings is not None:
+                timings.add(key, 'resolve', start, sampled, batch=True)
+            self._expectation_changed(expected)
+            trained = True
+        elif mode == 'TRAINING' and all(_summarizes(expected, value) for value in sampled):
+            if timings is not None:
+                start = time.perf_counter()
+            self._resolve_batch(batch.as_list(sampled), expected)
+            if timings is not None:
+                timings.add(key, 'resolve', start, sampled, batch=True)
+            self._expectation_changed(expected)
+            trained = True
+            self._update_id(expected, expectation_id, index)
+        else:
+            if timings is not None:
+                start = time.perf_counter()
+            failing = self._first_failing(sampled, expected)
+            if timings is not None:
+                timings.add(key, 'validate', start, sampled, batch=True)
+            if failing is not MISSING:
+                self._validator.validate(failing, self._matcher(expected))
+                if mode == 'INTERACTIVE':
+                    logger.console(f"\nExecution paused on row with id '{expectation_id}'")
+                    self._materialize(expected)
+                    if timings is not None:
+                        start = time.perf_counter()
+                    self._inspect(failing, expectation_id, current_expectations)
+                    if timings is not None:
+                        timings.add(key, 'inspect', start, failing)
+                    self._expectation_changed(expected)
+                elif mode == 'TRAINING':
+                    self._console("\nUnexpected {} - updating expectations", failing)
+                    self._materialize(expected)
+                    if timings is not None:
+                        start = time.perf_counter()
+                    self._resolve_batch(batch.as_list(sampled), expected)
+                    if timings is not None:
+                        timings.add(key, 'resolve', start, sampled, batch=True)
+                    self._expectation_changed(expected)
+                    trained = True
+                else:
+                    raise AssertionError(self._unexpected(failing))
+                failing = self._first_failing(sampled, expected)
+                if failing is not MISSING:
+                    raise AssertionError(self._unexpected(failing))
+            self._info("{} values match expectations", len(sampled))
+            trained = self._update_id(expected, expectation_id, index) or trained
+        if trained and self._journal is not None:
+            for value in batch.as_list(sampled):
+                self._journal.record(section, name, expectation_id, self._expectation_index, value)
+
+    def _resolve(self, value:object, expected:Dict[str, object]) -> None:
+        from .training import ExpectationResolver
+        ExpectationResolver(value, expected, self._examples, self._tolerance).resolve()
+
+    def _resolve_batch(self, values:List[object], expected:Dict[str, object]) -> bool:
+        from .training import BatchResolver
+        return BatchResolver(values, expected, self._examples, self._tolerance).resolve()
+
+    def _inspect(self, value:object, expectation_id:str, expectations:List[Dict[str, object]]) -> None:
+        from .inspector import NotMatchingValueInspector
+        NotMatchingValueInspector(value, expectation_id, expectations, self._max_log_length).cmdloop()
+
+    def _locate(self, id:Optional[str]) -> Tuple[str, str, str, List[Dict[str, object]], Dict[str, Dict[str, object]], Optional[Dict[str, object]]]:
+        '''Expectation id, section, name, expectations and index of the current test or keyword and the expectation.'''
+        if not id and not self._keyword_listener:
+            raise AssertionError("Expectation id is needed when keyword_listener is off")
+        expectation_id:str = id if id else self._position_id()
+        section, name = ("Tests", self._current_test) if self._current_keyword == 'UNKNOWN' else ("Keywords", self._current_keyword)
+        self._location = (section, name)
+        self._shared_key = self._shared_keyword if section == "Keywords" else None
+        if self._shared_key is not None:
+            current_expectations, index = cast('SharedKeywords', self._shared).get(*self._shared_key)
+        else:
+            if self._shards is not None and name not in self.expectations[section]:
+                self._load_shard(section, name)
+            current_expectations = self.expectations[section].setdefault(name, [])
+            index = self._index[section].setdefault(name, {})
+        self._expectation_index += 1
+        return expectation_id, section, name, current_expectations, index, self._find_expected(expectation_id, current_expectations, index)
+
+    def _update_id(self, expected:Dict[str, object], expectation_id:str, index:Dict[str, Dict[str, object]]) -> bool:
+        if expected['id'] == expectation_id:
+            return False
+        if expected.get('expectId', False):
+            raise AssertionError(f"Unexpected actual id {expectation_id} != {expected['id']}")
+        self._debug("Expectation id mismatch. Expected '{}' and was '{}'. Updating expectation id.", expected['id'], expectation_id)
+        if index.get(cast(str, expected['id'])) is expected:
+            del index[cast(str, expected['id'])]
+        expected['id'] = expectation_id
+        index.setdefault(expectation_id, expected)
+        self._expectation_changed(expected)
         return True
-    except (TypeError, OverflowError):
-        return False
 
+    def _first_failing(self, values:Sequence[object], expected:Dict[str, object]) -> object:
+        '''First of the values that does not match the expectation or MISSING.'''
+        from . import batch
+        matcher = self._matcher(expected)
+        if matcher.rules and all(rule in _RANGE_RULES for rule, _ in matcher.rules):
+            bounds = batch.numeric_range(values)
+            if bounds is not None and all(_RANGE_RULES[rule](bounds, limit) for rule, limit in matcher.rules):
+                return MISSING
+        for value in batch.as_list(values):
+            if not _QUIET_VALIDATOR.validate(value, matcher):
+                return value
+        return MISSING
+
+    def _replay(self, entry:Dict[str, object]) -> None:
+        '''Train with a journal entry the same way as when the entry was recorded.'''
+        name = cast(str, entry['name'])
+        self._current_test, self._current_keyword = (name, "UNKNOWN") if entry['section'] == "Tests" else ("UNKNOWN", name)
+        self._expectation_index = cast(int, entry['position']) - 1
+        from . import journal
+        self.should_be_as_expected(journal.decode(entry, self._blobs), id=cast(str, entry['id']), training=True)
+
+    def _train_batch(self, entries:List[Dict[str, object]]) -> None:
+        '''Train with all journal entries of one expectation. The first one is replayed
+        and the expectation is resolved from the rest at once.'''
+        self._replay(entries[0])
+        section, name = cast(str, entries[0]['section']), cast(str, entries[0]['name'])
+        expected = self._index[section][name][cast(str, entries[0]['id'])]
+        from . import journal
+        values = [journal.decode(entry, self._blobs) for entry in entries[1:]]
+        if not values:
+            return
+        # Stored strings are resolved like any others and stay stored
+        stored = self._materialize(expected)
+        if self._resolve_batch(values, expected):
+            self._expectation_changed(expected)
+        if self._blobs is not None:
+            self._blobs.reference(expected, stored)
+
+class _SuiteListener:
+    '''Listener of the library without keyword callbacks.'''
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, library:Expects) -> None:
+        self._start_suite = library._start_suite
+        self._end_suite = library._end_suite
+        self._start_test = library._start_test
+        self._end_test = library._end_test
+
+
+_LOG_LEVELS = ['TRACE', 'DEBUG', 'INFO', 'WARN', 'ERROR', 'NONE']
+
+def _log_level() -> str:
+    try:
+        level = BuiltIn().get_variable_value('${LOG LEVEL}', 'INFO')
+    except RobotNotRunningError:
+        return 'INFO'
+    return str(level).split(':')[0].upper()
+
+def _shorten(value:object, max_length:Optional[int], digest:bool=False) -> str:
+    '''Beginning of the value and its length. Failure messages add a sha256 to tell long values apart.'''
+    text = str(value)
+    if max_length is None or len(text) <= max_length:
+        return text
+    if not digest:
+        return f"{text[:max_length]}... ({len(text)} characters)"
+    sha256 = hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+    return f"{text[:max_length]}... ({len(text)} characters, sha256 {sha256[:16]})"
+
+
+class _Log:
+    '''Writes log messages with values formatted in only when the message is logged.
+    Values are shortened to max_length characters. The current log level is given with
+    set_level, messages below it are skipped.'''
+
+    def __init__(self, write:Callable[[str], None], level:Optional[str]=None, max_length:Optional[int]=None) -> None:
+        self._write = write
+        self._level = level
+        self._max_length = max_length
+        self._enabled = True
+        self.set_level('INFO')
+
+    def set_level(self, current:str) -> None:
+        if self._level is not None:
+            self._enabled = _LOG_LEVELS.index(self._level) >= _LOG_LEVELS.index(current if current in _LOG_LEVELS else 'INFO')
+
+    def __call__(self, message:str, *values:object) -> None:
+        if not self._enabled:
+            return
+        if not values:
+            self._write(message)
+        else:
+            self._write(message.format(*(_shorten(value, self._max_length) for value in values)))
+
+    def enabled(self) -> bool:
+        return self._enabled
+
+
+def _write_json_atomically(filename:str, data:object, compact:bool) -> None:
+    '''Write to a temporary file next to the target and rename it over the target.'''
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmpname = tempfile.mkstemp(prefix=os.path.basename(filename), suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            if compact:
+                json.dump(data, f, separators=(',', ':'), sort_keys=True)
+            else:
+                json.dump(data, f, indent=2, sort_keys=True)
+        os.chmod(tmpname, _file_mode(filename))
+        os.replace(tmpname, filename)
+    except BaseException:
+        os.remove(tmpname)
+        raise
+
+def _file_mode(filename:str) -> int:
+    if os.path.exists(filename):
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+def _index_by_id(expectations:List[Dict[str, object]]) -> Dict[str, Dict[str, object]]:
+    '''Map ids to expectations. First expectation with an id wins like in a linear search.'''
+    index:Dict[str, Dict[str, object]] = {}
+    for exp in expectations:
+        index.setdefault(cast(str, exp['id']), exp)
+    return index
 
 class Validator:
 
     def __init__(self, log:Callable[[str], None]) -> None:
-        self._log = log
+        # Plain callables like logger.info get the messages formatted in full
+        self._log = log if isinstance(log, _Log) else _Log(log)
 
-    def validate(self, value:object, expected:Dict[str, object]) -> bool:
+    def validate(self, value:object, expected:Union[Dict[str, object], 'Matcher']) -> bool:
+        matcher = expected if isinstance(expected, Matcher) else Matcher(expected)
         isValid = True
-        if 'value' in expected:
-            isValid &= self._validate_value(value, expected['value'])
-        if 'anyof' in expected:
-            isValid &= self._validate_anyof(value, cast(List[object], expected['anyof']))
-        if 'fields' in expected:
-            isValid &= self._validate_fields(value, cast(Dict[str, Dict[str, object]], expected['fields']))
-        if 'startswith' in expected:
-            isValid &= self._validate_startswith(value, cast(str, expected['startswith']))
-        if 'regex' in expected:
-            isValid &= self._validate_regex(value, cast(str, expected['regex']))
-        if 'min' in expected:
-            isValid &= self._validate_min(value, cast(float, expected['min']))
-        if 'max' in expected:
-            isValid &= self._validate_max(value, cast(float, expected['max']))
-        if expected.get('expectId', False):
-            isValid &= self._validate_id(value, cast(str, expected['id']))
+        for rule, constraint in matcher.rules:
+            isValid &= rule(self, value, constraint)
         return isValid
 
     def _validate_id(self, value:object, actualId:str) -> bool:
         if value != actualId:
-            self._log(f"[ID]: Validation failed '{value}' was expected and actual was '{actualId}'")
+            self._log("[ID]: Validation failed '{}' was expected and actual was '{}'", value, actualId)
             return False
-        self._log(f"Id matches expected")
+        self._log("Id matches expected")
         return True
 
     def _validate_value(self, value:object, expected:object) -> bool:
-        if value != expected:
-            self._log(f"[VALUE]: Validation failed. '{expected}' differs from '{value}'")
+        # Blob compares the digest of value and loads the expected string only for logging
+        if expected != value:
+            self._log("[VALUE]: Validation failed. '{}' differs from '{}'", expected, value)
             return False
         self._log("Matches expected value")
         return True
 
+    def _validate_digest(self, value:object, expected:'ValueDigest') -> bool:
+        from .digests import ValueDigest
+        actual = value if isinstance(value, ValueDigest) else ValueDigest.of(value)
+        if actual != expected:
+            self._log("[DIGEST]: Validation failed. {} differs from {}", expected, actual)
+            return False
+        self._log("Matches size and sha256")
+        return True
+
     def _validate_anyof(self, value:object, expected:List[object]) -> bool:
         if value not in expected:
-            self._log(f"[ANYOF]: Validation failed. '{value}' not in '{expected}'")
+            self._log("[ANYOF]: Validation failed. '{}' not in '{}'", value, expected)
             return False
         self._log("Matches anyof")
         return True
 
     def _validate_startswith(self, value:object, expected_start:str) -> bool:
         if not isinstance(value, str):
-            self._log(f"[TYPE]: Value '{value}' is not a string")
+            self._log("[TYPE]: Value '{}' is not a string", value)
             return False
         if not value.startswith(expected_start):
-            self._log(f"[STARTSWITH]: Value '{value}' does not start with '{expected_start}'")
+            self._log("[STARTSWITH]: Value '{}' does not start with '{}'", value, expected_start)
             return False
         self._log("Matches startswith")
         return True
 
-    def _validate_regex(self, value:object, expected:str) -> bool:
+    def _validate_regex(self, value:object, expected:Union['GapPattern', Pattern[str]]) -> bool:
         if not isinstance(value, str):
-            self._log(f"[TYPE]: Value '{value}' is not a string")
+            self._log("[TYPE]: Value '{}' is not a string", value)
             return False
-        if not re.compile(expected).match(value):
-            self._log(f"[REGEX]: Value '{value}' does not match patter")
+        if not expected.match(value):
+            self._log("[REGEX]: Value '{}' does not match patter", value)
             return False
         self._log("Matches regex")
         return True
 
+    def _validate_type(self, value:object, expected:str) -> bool:
+        from .paths import is_container
+        if not is_container(value, dict if expected == 'dict' else list):
+            self._log("[TYPE]: Value '{}' is not a {}", value, expected)
+            return False
+        self._log("Matches type")
+        return True
+
+    def _validate_nonempty(self, value:object, expected:bool) -> bool:
+        if expected and not value:
+            self._log("[NONEMPTY]: Value '{}' is empty", value)
+            return False
+        self._log("Matches nonempty")
+        return True
+
     def _validate_min(self, value:object, expected:float) -> bool:
         if not isinstance(value, Number):
-            self._log(f"[TYPE]: Value '{value}' is not a number")
+            self._log("[TYPE]: Value '{}' is not a number", value)
             return False
         if cast(float, value) < expected:
-            self._log(f"[MIN]: Value {value} is smaller than expected")
+            self._log("[MIN]: Value {} is smaller than expected", value)
             return False
         self._log("Matches min constraint")
         return True
 
     def _validate_max(self, value:object, expected:float) -> bool:
         if not isinstance(value, Number):
-            self._log(f"[TYPE]: Value '{value}' is not a number")
+            self._log("[TYPE]: Value '{}' is not a number", value)
             return False
         if cast(float, value) > expected:
-            self._log(f"[MAX]: Value {value} is bigger than expected")
+            self._log("[MAX]: Value {} is bigger than expected", value)
             return False
         self._log("Matches max constraint")
         return True
 
-    def _validate_fields(self, value:object, fields:Dict[str, Dict[str, object]]) -> bool:
+    def _validate_band(self, value:object, band:Tuple[float, float]) -> bool:
+        if not isinstance(value, Number):
+            self._log("[TYPE]: Value '{}' is not a number", value)
+            return False
+        if not band[0] <= cast(float, value) <= band[1]:
+            self._log("[BAND]: Value {} is not within {} and {}", value, band[0], band[1])
+            return False
+        self._log("Matches tolerance band")
+        return True
+
+    def _validate_fields(self, value:object, fields:Dict[str, 'Matcher']) -> bool:
         isValid = True
-        matchingFields:Set[str] = set()
-        for field, val in inspect.getmembers(value):
-            if field in fields:
-                matchingFields.add(field)
-                if not self.validate(val, fields[field]):
-                    self._log(f"[FIELD]: {field} has unexpected value")
-                    isValid = False
-        missingFields = set(fields.keys()) - matchingFields
+        missingFields:List[str] = []
+        for field, matcher in fields.items():
+            val = field_value(value, field)
+            if val is MISSING:
+                missingFields.append(field)
+            elif not self.validate(val, matcher):
+                self._log("[FIELD]: {} has unexpected value", field)
+                isValid = False
         if missingFields:
-            self._log(f'[FIELD]: Missing expected fields [{", ".join(missingFields)}] in value')
+            self._log("[FIELD]: Missing expected fields [{}] in value", ", ".join(missingFields))
             return False
         if isValid:
             self._log("Matching fields")
         return isValid
 
 
-class _ValueInspector(Cmd):
-    intro = '\n## Value inspector shell. Type help or ? to list commands. ##\n'
-    prompt = 'inspector >> '
-
-    def __init__(self, value:object, expectation_id:str, expectations:List[Dict[str, object]]) -> None:
-        # Robot Framework mangles outputs and inputs
-        self._oldstdin = sys.stdin
-        self._oldstdout = sys.stdout
-        sys.stdin = sys.__stdin__
-        sys.stdout = sys.__stdout__
-        Cmd.__init__(self)
-        self._value = value
-        self._id = expectation_id
-        self._expectations = expectations
-
-    def postloop(self):
-        sys.stdin = self._oldstdin
-        sys.stdout = self._oldstdout
-
-
-class NotMatchingValueInspector(_ValueInspector):
-
-    def __init__(self, value:object, expectation_id:str, expectations:List[Dict[str, object]]) -> None:
-        _ValueInspector.__init__(self, value, expectation_id, expectations)
-        self._expected = [e for e in expectations if e["id"] == expectation_id][0]
-        self._has_old_value = 'value' in self._expected
-        self._old_expected_value = self._expected.get('value')
-        self._fields:List[Tuple[str, Dict[str, object]]] = []
-        for field, val in inspect.getmembers(self._value):
-            if not field.startswith('_') and _is_jsonable(val):
-                self._fields.append((field, {'value':val}))
-
-    def do_diff(self, attrs) -> None:
-        'Show diff to expected value'
-        logger.console(f"Expected:{self._old_expected_value}")
-        logger.console(f"Actual:{self._value}")
-
-    def do_replace(self, attrs) -> None:
-        'Replace expectation with current value'
-        logger.console(f"Replaced {self._old_expected_value} with {self._value}")
-        self._expected['value'] = self._value
-
-    def do_min(self, minvalue:str) -> None:
-        'Set min constraint. Removes value constraint.'
-        min_val = float(minvalue)
-        logger.console(f"Setting min value constraint to {min_val}")
-        if 'value' in self._expected:
-            del self._expected['value']
-        self._expected['min'] = min_val
-
-    def do_max(self, maxvalue:str) -> None:
-        'Set max constraint. Removes value constraint.'
-        max_val = float(maxvalue)
-        logger.console(f"Setting max value constraint to {max_val}")
-        if 'value' in self._expected:
-            del self._expected['value']
-        self._expected['max'] = max_val
-
-    def do_startswith(self, value:str) -> None:
-        'Set startswith constraint. Removes value constraint.'
-        logger.console(f"Setting startswith constraint to '{value}'")
-        if 'value' in self._expected:
-            del self._expected['value']
-        self._expected['startswith'] = value
-
-    def do_regex(self, value:str) -> None:
-        'Set regex match constraint. Removes value constraint.'
-        logger.console(f"Setting regex constraint to '{value}'")
-        if 'value' in self._expected:
-            del self._expected['value']
-        self._expected['regex'] = value
-
-    def do_field(self, line:str) -> None:
-        'Set field specific expectation.'
-        parts = line.split(None, 2)
-        if not parts:
-            logger.console("field command needs a field name")
-            return
-        name:str = parts[0]
-        matching = [v for f,v in self._fields if f == name]
-        if not matching:
-            logger.console("Unknown field name '{name}'")
-            return
-        if 'fields' not in self._expected:
-            self._expected['fields'] = {}
-        fields = cast(Dict[str, Dict[str, object]], self._expected['fields'])
-        if name not in fields:
-            fields[name] = {}
-        if len(parts) == 1:
-            fields[name] = matching[0]
-            logger.console(f"Expecting field: {name} to have value {fields[name]['value']}")
-            return
-        if parts[1] != 'value' and 'value' in fields[name]:
-            del fields[name]['value']
-        fields[name][parts[1]] = parts[2]
-        logger.console(f"Expecting field: {name} to match {parts[1]} with {parts[2]}")
-
-    def complete_field(self, text:str, line:str, begidx:int, endidx:int) -> List[str]:
-        completes:List[str] = []
-        for field, _ in self._fields:
-            if field.startswith(text):
-                completes.append(field)
-        a = [s.strip() for s in line.split(None, 2)]
-        if len(a) >= 2 and a[1] in [f[0] for f in self._fields]:
-            completes.clear()
-            for expect in ['max', 'min', 'startswith', 'regex', 'value']:
-                if expect.startswith(text):
-                    completes.append(expect)
-        return completes
-
-    def do_show(self, field:str) -> None:
-        'Show value of the current object or a field'
-        if field:
-            for f, val in self._fields:
-                if f == field:
-                    logger.console(f"Field:{field}\nvalue:{val['value']}\ntype:{type(val['value'])}")
-            return
-        logger.console(f"Value:{self._value}\ntype:{type(self._value)}")
-        if not self._fields:
-            return
-        logger.console(f'Fields:')
-        for field, _ in self._fields:
-            logger.console('  '+field)
-
-    def complete_show(self, text:str, line:str, begidx:int, endidx:int) -> List[str]:
-        completes:List[str] = []
-        for field, _ in self._fields:
-            if field.startswith(text):
-                completes.append(field)
-        return completes
-
-    def do_test(self, attrs) -> None:
-        'Test if values match the constraints'
-        logger.console(f"Expecting: {self._expected}")
-        if Validator(logger.console).validate(self._value, self._expected):
-            logger.console("PASSED. New value matches constraints")
-        else:
-            logger.console("FAILED. New value did not match constraints")
-        if not self._has_old_value:
-            return
-        if Validator(logger.console).validate(self._old_expected_value, self._expected):
-            logger.console("PASSED. Old value matches constraints")
-        else:
-            logger.console("FAILED. Old value did not match constraints")
+    def _validate_paths(self, value:object, expected_paths:'PathTree[Matcher]') -> bool:
+        isValid = True
+        for path, matcher, val in expected_paths.walk(value):
+            if val is MISSING:
+                self._log("[PATH]: Missing {} in value", path)
+                isValid = False
+            elif not self.validate(val, matcher):
+                self._log("[PATH]: {} has unexpected value", path)
+                isValid = False
+        if isValid:
+            self._log("Matching paths")
+        return isValid
 
-    def do_quit(self, args) -> bool:
-        'Quit Value Inspector and store new expectations'
-        return True
 
+class Matcher:
+    '''Expectation compiled once into the rules Validator runs for it.
+    Has to be recompiled when the expectation changes.'''
+
+    def __init__(self, expected:Dict[str, object], blobs:Optional['BlobStore']=None) -> None:
+        self.expected = expected
+        rules:List[Tuple[Callable[[Validator, object, Any], bool], object]] = []
+        if 'value' in expected:
+            rules.append((Validator._validate_value, self._blob(expected['value'], blobs)))
+        if 'anyof' in expected:
+            rules.append((Validator._validate_anyof, [self._blob(item, blobs) for item in cast(List[object], expected['anyof'])]))
+        if 'fields' in expected:
+            fields = cast(Dict[str, Dict[str, object]], expected['fields'])
+            rules.append((Validator._validate_fields, {name:Matcher(field, blobs) for name, field in fields.items()}))
+        if 'paths' in expected:
+            expected_paths = cast(Dict[str, Dict[str, object]], expected['paths'])
+            from .paths import PathTree
+            rules.append((Validator._validate_paths, PathTree({path:Matcher(exp, blobs) for path, exp in expected_paths.items()})))
+        if 'type' in expected:
+            rules.append((Validator._validate_type, expected['type']))
+        if 'nonempty' in expected:
+            rules.append((Validator._validate_nonempty, expected['nonempty']))
+        if 'startswith' in expected:
+            rules.append((Validator._validate_startswith, expected['startswith']))
+        if 'regex' in expected:
+            from .substrings import compile_pattern
+            rules.append((Validator._validate_regex, compile_pattern(cast(str, expected['regex']))))
+        if 'min' in expected:
+            rules.append((Validator._validate_min, float(cast(float, expected['min']))))
+        if 'max' in expected:
+            rules.append((Validator._validate_max, float(cast(float, expected['max']))))
+        if 'band' in expected:
+            from .summary import NumberSummary
+            numbers = NumberSummary.from_json(cast(Dict[str, object], expected['stats']))
+            rules.append((Validator._validate_band, numbers.band(cast(str, expected['band']))))
+        if 'sha256' in expected:
+            from .digests import ValueDigest
+            rules.append((Validator._validate_digest, ValueDigest(cast(Optional[int], expected.get('size')), cast(str, expected['sha256']))))
+        if expected.get('expectId', False):
+            rules.append((Validator._validate_id, expected['id']))
+        self.rules = tuple(rules)
+
+    @staticmethod
+    def _blob(value:object, blobs:Optional['BlobStore']) -> object:
+        if isinstance(value, dict) and _BLOB_KEY in value:
+            from .blobs import Blob, is_reference
+            if is_reference(value):
+                return Blob(value[_BLOB_KEY], blobs)
+        return value
 
-class ExpectationResolver:
 
-    def __init__(self, value:object, expected:Dict[str, object]) -> None:
-        self._value = value
-        self._expected = expected
-        self._has_old_value = 'value' in self._expected
-        self._old_expected_value = self._expected.get('value')
-        self._fields:List[Tuple[str, Dict[str, object]]] = []
-        for field, val in inspect.getmembers(self._value):
-            if not field.startswith('_') and _is_jsonable(val):
-                self._fields.append((field, {'value':val}))
+_BLOB_KEY = '$blob'  # blobs.REFERENCE_KEY
+# Values of these types are digested only when asked to, so checking them does not import digests
+_UNDIGESTED_TYPES = {str, int, float, bool, dict, list, tuple, type(None)}
 
-    def resolve(self):
-        jsonable = _is_jsonable(self._value)
-        anyof = self._expected.get('anyof', [])
-        if self._has_old_value and self._old_expected_value == self._value:
-            return
-        if ('value' in self._expected or
-            ('anyof' in self._expected and (len(anyof) < 5 or
-            any(type(item) != type(self._value) for item in anyof)))) and jsonable:
-            return self._resolve_with_anyof()
-        if isinstance(self._value, str):
-            return self._resolve_str()
-        if isinstance(self._value, Number):
-            return self._resolve_number()
-        if jsonable and not self._has_old_value:
-            self._expected['value'] = self._value
+# Whether a batch with the smallest and largest value in bounds passes a rule
+_RANGE_RULES:Dict[Callable[..., bool], Callable[[Tuple[float, float], Any], bool]] = {
+    Validator._validate_min: lambda bounds, limit: bounds[0] >= limit,
+    Validator._validate_max: lambda bounds, limit: bounds[1] <= limit,
+    Validator._validate_band: lambda bounds, band: band[0] <= bounds[0] and bounds[1] <= band[1],
+}
+
+def _summarizes(expected:Dict[str, object], value:object) -> bool:
+    return 'stats' in expected and isinstance(value, Number)
+
+_QUIET_VALIDATOR = Validator(_Log(lambda message: None))
+
+
+class ExampleRetention:
+    '''Which trained string values are kept as examples of an expectation.
+    ALL keeps all values, NONE no values, LATEST:<n> the n latest values and
+    RESERVOIR:<n> a uniformly random sample of n values.'''
+
+    def __init__(self, policy:str='ALL') -> None:
+        name, _, size = policy.upper().partition(':')
+        if name not in ('ALL', 'NONE', 'LATEST', 'RESERVOIR') or (name in ('LATEST', 'RESERVOIR')) != size.isdigit():
+            raise ValueError(f"Unknown examples policy '{policy}'. Use ALL, NONE, LATEST:<n> or RESERVOIR:<n>")
+        self._name = name
+        self._size = int(size) if size else 0
+
+    def keeps_all(self) -> bool:
+        return self._name == 'ALL'
+
+    def keep(self, expected:Dict[str, object], values:List[object]) -> None:
+        if self._name == 'NONE':
+            expected.pop('examples', None)
             return
-        if not jsonable and self._fields:
-            return self._resolve_complex_object()
-        raise AssertionError(f"No strategy for type {type(self._value)}")
-
-    def _resolve_with_anyof(self):
-        if 'value' in self._expected:
-            del self._expected['value']
-            self._expected['anyof'] = [self._old_expected_value]
-        if self._value not in self._expected['anyof']:
-            self._expected['anyof'].append(self._value)
-        logger.console(f"Resolved with anyof")
-
-    def _resolve_str(self):
-        if self._has_old_value:
-            parts = substrings.find_matching_parts(self._value, self._old_expected_value)
-            if parts != [] and parts != [""]:
-                del self._expected['value']
-                self._expected['regex'] = substrings.regexpify(parts).pattern
-                self._expected['examples'] = [self._value, self._old_expected_value]
-                logger.console(f"Resolved with regex")
-                return
-            raise AssertionError("Could not resolve with a meaninful regex")
-        elif 'regex' in self._expected and 'examples' in self._expected:
-            return self._resolve_with_regex()
-        elif 'anyof' in self._expected:
-            self._expected['examples'] = self._expected['anyof']
-            del self._expected['anyof']
-            return self._resolve_with_regex()
+        examples = cast(List[object], expected.setdefault('examples', []))
+        if self._name == 'ALL':
+            examples.extend(values)
+        elif self._name == 'LATEST':
+            examples.extend(values)
+            del examples[:-self._size or len(examples)]
         else:
-            self._expected['value'] = self._value
-
-    def _resolve_with_regex(self):
-        combined = substrings.find_matching_parts(self._value, self._expected['examples'][0])
-        for example in self._expected['examples'][1:]:
-            combined = substrings.combine(combined, example)
-        if combined != [] and combined != [""]:
-            self._expected['regex'] = substrings.regexpify(combined).pattern
-            self._expected['examples'].append(self._value)
-            logger.console(f"Resolved with regex")
-            return
-        raise AssertionError("Could not resolve with a meaninful regex")
-
-    def _resolve_number(self):
-        assert 'value' not in self._expected or 'min' not in self._expected
-        if self._has_old_value:
-            del self._expected['value']
-            self._expected['min'] = min(self._value, self._old_expected_value)
-            self._expected['max'] = max(self._value, self._old_expected_value)
-            logger.console(f"Resolved with min {self._expected['min']} and max {self._expected['max']}")
-            return
-        if 'anyof' in self._expected:
-            self._expected['min'] = min(self._value, *self._expected['anyof'])
-            self._expected['max'] = max(self._value, *self._expected['anyof'])
-            del self._expected['anyof']
-            logger.console(f"Resolved with min {self._expected['min']} and max {self._expected['max']}")
-            return
-        if 'min' in self._expected and 'max' in self._expected:
-            self._expected['min'] = min(self._value, self._expected['min'])
-            self._expected['max'] = max(self._value, self._expected['max'])
-            assert 'value' not in self._expected
-            logger.console(f"Resolved with min {self._expected['min']} and max {self._expected['max']}")
-            return
-        self._expected['value'] = self._value
-
-    def _resolve_complex_object(self):
-        if self._has_old_value:
-            raise AssertionError(f"No startegy for complex object with already expected value")
-        if 'fields' in self._expected:
-            for field, val in self._fields:
-                if field in self._expected['fields']:
-                    ExpectationResolver(val['value'], self._expected['fields'][field]).resolve()
-            logger.console("Resolved by updating field expectations")
-            return
-        self._expected['fields'] = dict(self._fields)
-        logger.console("Resolved by expecting all fields")
+            seen = cast(int, expected.get('examples_seen', len(examples)))
+            for value in values:
+                seen += 1
+                if len(examples) < self._size:
+                    examples.append(value)
+                else:
+                    index = random.randrange(seen)
+                    if index < self._size:
+                        examples[index] = value
+            expected['examples_seen'] = seen
+
+
+_LAZY = {'ExpectationResolver':'training', 'BatchResolver':'training', 'NotMatchingValueInspector':'inspector'}
+_SUBMODULES = ('substrings', 'blobs', 'batch', 'digests', 'paths', 'journal')
+
+def __getattr__(name:str) -> Any:
+    '''Resolvers, the inspector and subsystems are importable from here, but imported only when first used.'''
+    import importlib
+    if name in _LAZY:
+        return getattr(importlib.import_module(f'.{_LAZY[name]}', __name__), name)
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,69 @@
+'''Helpers for validating many values against one expectation.'''
+from array import array
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple
+import functools
+import sys
+
+_NUMERIC_TYPECODES = set('bBhHiIlLqQfd')
+
+def _numpy(load:bool=False) -> Any:
+    '''NumPy when it is already imported, or when load is set and it is installed.
+    NumPy is optional and imported only for numeric ranges as it is slow to import.'''
+    if 'numpy' in sys.modules:
+        return sys.modules['numpy']
+    return _import_numpy() if load else None
+
+@functools.lru_cache(maxsize=None)
+def _import_numpy() -> Any:
+    try:
+        import numpy  # type: ignore
+    except ImportError:
+        return None
+    return numpy
+
+def sample(values:object, every:int) -> Tuple[Sequence[object], int]:
+    '''Every nth value and the number of all values. Sequences are sliced, other iterables read once.'''
+    if every < 1:
+        raise ValueError(f"Sample rate has to be at least 1, was {every}")
+    # Strings and dicts are iterable too, but as characters and keys
+    if isinstance(values, (str, bytes, bytearray, memoryview, Mapping)) or not isinstance(values, Iterable):
+        raise TypeError(f"Values have to be a list or other iterable of values, not {type(values).__name__}")
+    numpy = _numpy()
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        flat = values.reshape(-1)
+        return flat[::every], flat.size
+    if isinstance(values, (list, tuple, range, array)):
+        return values[::every], len(values)
+    sampled:List[object] = []
+    count = 0
+    for count, value in enumerate(values, 1):  # type: ignore
+        if (count - 1) % every == 0:
+            sampled.append(value)
+    return sampled, count
+
+def as_list(values:Sequence[object]) -> List[object]:
+    '''Values as a list of Python objects, also for arrays of NumPy scalars.'''
+    return values.tolist() if hasattr(values, 'tolist') else list(values)  # type: ignore
+
+def numeric_range(values:Sequence[object]) -> Optional[Tuple[float, float]]:
+    '''Smallest and largest of the values, or None when they are not all floats or numbers of a numeric array.'''
+    if len(values) == 0:
+        return None
+    numpy = _numpy(load=True)
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        if values.dtype.kind not in 'biuf':
+            return None
+        return values.min(), values.max()
+    if isinstance(values, array) and values.typecode in _NUMERIC_TYPECODES:
+        numbers = values
+    elif any(isinstance(value, int) for value in values):
+        return None  # Ints above 2**53 are not exact as doubles, they are checked one by one
+    else:
+        try:
+            numbers = array('d', values)  # type: ignore
+        except (TypeError, OverflowError):
+            return None
+    if numpy is not None:
+        vector = numpy.asarray(numbers)
+        return vector.min(), vector.max()
+    return min(numbers), max(numbers)
@@ -0,0 +1,152 @@
+'''Content addressed storage for large expected string values.
+
+Strings longer than the threshold are stored once in a directory next to the
+expectations file, in files named by their sha256 digest. The expectations file
+refers to them with {"$blob": "<digest>"}.
+'''
+from typing import Callable, Dict, List, Optional, Set, cast
+import hashlib
+import os
+import re
+import tempfile
+import zlib
+
+REFERENCE_KEY = '$blob'
+_COMPRESSED_SUFFIX = '.z'
+_BLOB_NAME = re.compile(f'([0-9a-f]{{64}})(?:{re.escape(_COMPRESSED_SUFFIX)})?')
+
+def digest(value:str) -> str:
+    return hashlib.sha256(value.encode('utf-8', 'surrogatepass')).hexdigest()
+
+def is_reference(value:object) -> bool:
+    return isinstance(value, dict) and len(value) == 1 and REFERENCE_KEY in value
+
+
+class Blob:
+    '''Expected string stored in a BlobStore. Compares equal to strings with the same
+    digest and loads the string only when it is needed as a string.'''
+
+    def __init__(self, digest:str, store:Optional['BlobStore']) -> None:
+        self.digest = digest
+        self._store = store
+
+    def __eq__(self, other:object) -> bool:
+        if isinstance(other, Blob):
+            return self.digest == other.digest
+        return isinstance(other, str) and digest(other) == self.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __str__(self) -> str:
+        try:
+            return self.value
+        except OSError:
+            return f"<missing blob {self.digest}>"
+
+    @property
+    def value(self) -> str:
+        if self._store is None:
+            raise FileNotFoundError(f"No blob store for blob {self.digest}")
+        return self._store.load(self.digest)
+
+
+class BlobStore:
+
+    def __init__(self, directory:str, threshold:int=0, compress:bool=False) -> None:
+        '''threshold = strings longer than this are stored as blobs, 0 stores no new blobs
+        compress = compress new blobs with zlib
+        '''
+        self.directory = directory
+        self._threshold = threshold
+        self._compress = compress
+        self._cache:Dict[str, str] = {}
+
+    def stores(self, value:object) -> bool:
+        '''Whether the value is a string long enough to be stored as a blob.'''
+        return isinstance(value, str) and bool(self._threshold) and len(value) > self._threshold
+
+    def load(self, digest:str) -> str:
+        if digest not in self._cache:
+            path = os.path.join(self.directory, digest)
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+            else:
+                with open(path + _COMPRESSED_SUFFIX, 'rb') as f:
+                    data = zlib.decompress(f.read())
+            self._cache[digest] = data.decode('utf-8', 'surrogatepass')
+        return self._cache[digest]
+
+    def store(self, value:str) -> Dict[str, str]:
+        value_digest = digest(value)
+        path = os.path.join(self.directory, value_digest)
+        if not os.path.isfile(path) and not os.path.isfile(path + _COMPRESSED_SUFFIX):
+            data = value.encode('utf-8', 'surrogatepass')
+            if self._compress:
+                data, path = zlib.compress(data), path + _COMPRESSED_SUFFIX
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmpname = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmpname, path)
+        self._cache[value_digest] = value
+        return {REFERENCE_KEY:value_digest}
+
+    def materialize(self, expected:Dict[str, object]) -> Set[str]:
+        '''Replace blob references in the expectation with the stored strings. Returns their digests.'''
+        digests:Set[str] = set()
+        def materialized(value:object) -> object:
+            if not is_reference(value):
+                return value
+            digests.add(cast(Dict[str, str], value)[REFERENCE_KEY])
+            return self.load(cast(Dict[str, str], value)[REFERENCE_KEY])
+        self._walk(expected, materialized)
+        return digests
+
+    def reference(self, expected:Dict[str, object], digests:Set[str]) -> None:
+        '''Replace the strings of the expectation that are stored as one of the blobs with references to them.'''
+        if not digests:
+            return
+        def referenced(value:object) -> object:
+            if isinstance(value, str) and digest(value) in digests:
+                return {REFERENCE_KEY:digest(value)}
+            return value
+        self._walk(expected, referenced)
+
+    def externalize(self, expectations:Dict[str, Dict[str, List[Dict[str, object]]]]) -> Set[str]:
+        '''Store long strings of all expectations as blobs. Returns all referenced digests.'''
+        referenced:Set[str] = set()
+        def externalized(value:object) -> object:
+            if self.stores(value):
+                value = self.store(cast(str, value))
+            if is_reference(value):
+                referenced.add(cast(Dict[str, str], value)[REFERENCE_KEY])
+            return value
+        for section in expectations.values():
+            for exps in section.values():
+                for exp in exps:
+                    self._walk(exp, externalized)
+        return referenced
+
+    def prune(self, referenced:Set[str]) -> None:
+        '''Remove blobs that are no longer referenced. Files not named like blobs are left alone.'''
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            blob = _BLOB_NAME.fullmatch(name)
+            if blob is None or blob.group(1) in referenced:
+                continue
+            os.remove(os.path.join(self.directory, name))
+        if not os.listdir(self.directory):
+            os.rmdir(self.directory)
+
+    def _walk(self, expected:Dict[str, object], convert:Callable[[object], object]) -> None:
+        if 'value' in expected:
+            expected['value'] = convert(expected['value'])
+        for key in ('anyof', 'examples'):
+            if key in expected:
+                expected[key] = [convert(item) for item in cast(List[object], expected[key])]
+        for key in ('fields', 'paths'):
+            for sub in cast(Dict[str, Dict[str, object]], expected.get(key, {})).values():
+                self._walk(sub, convert)
@@ -0,0 +1,65 @@
+'''expects-shards converts expectations between yoursuite_expects.json and the sharded
+yoursuite_expects.shards directory that Library  Expects  sharded=True uses.
+
+split writes a shard for every test and keyword of the file and join writes all shards
+back to a single file. The source is removed unless --keep is given.
+'''
+from typing import Iterator, List, Optional
+import argparse
+import json
+import os
+import shutil
+import sys
+from . import _write_json_atomically, shards
+from .shards import ShardStore
+
+def split(expectations_file:str, compact:bool=False, keep:bool=False) -> None:
+    with open(expectations_file) as f:
+        expectations:shards.Expectations = json.load(f)
+    store = ShardStore(shards.directory_for(expectations_file), lambda path, data: _write_json_atomically(path, data, compact))
+    store.save(expectations, {(section, name) for section in shards.SECTIONS for name in expectations.get(section, {})})
+    if not keep:
+        os.remove(expectations_file)
+
+def join(expectations_file:str, compact:bool=False, keep:bool=False) -> None:
+    directory = shards.directory_for(expectations_file)
+    store = ShardStore(directory, lambda path, data: _write_json_atomically(path, data, compact))
+    if not store.exists():
+        raise FileNotFoundError(f"No shards in {directory}")
+    expectations:shards.Expectations = {section:{} for section in shards.SECTIONS}
+    store.load_all(expectations)
+    _write_json_atomically(expectations_file, expectations, compact)
+    if not keep:
+        shutil.rmtree(directory)
+
+def _expectation_files(paths:List[str], command:str) -> Iterator[str]:
+    for path in paths:
+        path = path.rstrip(os.sep)
+        if path.endswith(shards.SUFFIX):
+            yield path[:-len(shards.SUFFIX)] + '.json'
+            continue
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirnames, filenames in os.walk(path):
+            if command == 'split':
+                names = [name for name in sorted(filenames) if name.endswith('_expects.json')]
+            else:
+                names = [name[:-len(shards.SUFFIX)] + '.json' for name in sorted(dirnames) if name.endswith('_expects' + shards.SUFFIX)]
+            for name in names:
+                yield os.path.join(root, name)
+
+def main(argv:Optional[List[str]]=None) -> int:
+    parser = argparse.ArgumentParser(prog='expects-shards', description='Convert expectations between a single file and shards.')
+    parser.add_argument('command', choices=['split', 'join'], help='split files to shards or join shards to files')
+    parser.add_argument('paths', nargs='+', help='expectations files or directories to search for them')
+    parser.add_argument('--compact', action='store_true', help='write without indentation')
+    parser.add_argument('--keep', action='store_true', help='keep the converted file or shards')
+    args = parser.parse_args(argv)
+    convert = split if args.command == 'split' else join
+    for expectations_file in _expectation_files(args.paths, args.command):
+        convert(expectations_file, args.compact, args.keep)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+'''Bounded diffs of large values for the value inspector.
+
+The common prefix and suffix are found first with block wise comparisons, so only the part
+of the values that differs is split to lines and given to difflib, MAX_LINES lines at a time.
+'''
+from typing import Iterator, List, Tuple
+import difflib
+import io
+import itertools
+import json
+from .fields import is_jsonable
+
+BLOCK = 64 * 1024
+MAX_LINES = 5000
+LINE_WIDTH = 200
+
+def as_text(value:object) -> str:
+    if isinstance(value, str):
+        return value
+    if is_jsonable(value):
+        return json.dumps(value, indent=2, sort_keys=True)
+    return str(value)
+
+def common_prefix(a:str, b:str) -> int:
+    length = min(len(a), len(b))
+    size = 0
+    while size + BLOCK <= length and a[size:size + BLOCK] == b[size:size + BLOCK]:
+        size += BLOCK
+    while size < length and a[size] == b[size]:
+        size += 1
+    return size
+
+def common_suffix(a:str, b:str, prefix:int) -> int:
+    '''Length of the common end of a and b that does not overlap the prefix.'''
+    length = min(len(a), len(b)) - prefix
+    size = 0
+    while size + BLOCK <= length and a[len(a) - size - BLOCK:len(a) - size] == b[len(b) - size - BLOCK:len(b) - size]:
+        size += BLOCK
+    while size < length and a[len(a) - size - 1] == b[len(b) - size - 1]:
+        size += 1
+    return size
+
+def location(text:str, offset:int) -> Tuple[int, int]:
+    '''1-based line and column of offset.'''
+    line = text.count('\n', 0, offset) + 1
+    return line, offset - (text.rfind('\n', 0, offset) + 1) + 1
+
+def clip(line:str, width:int=LINE_WIDTH) -> str:
+    return line if len(line) <= width else line[:width] + f'... ({len(line)} chars)'
+
+def iter_lines(text:str) -> Iterator[str]:
+    '''Lines of text clipped to LINE_WIDTH, without splitting the whole text at once.'''
+    start = 0
+    while start < len(text):
+        end = text.find('\n', start)
+        end = len(text) if end < 0 else end
+        line = text[start:min(end, start + LINE_WIDTH)]
+        yield line if end - start <= LINE_WIDTH else f'{line}... ({end - start} chars)'
+        start = end + 1
+
+def window(text:str, offset:int, before:int=40, after:int=80) -> str:
+    start = max(0, offset - before)
+    return ('...' if start else '') + repr(text[start:offset + after])[1:-1] + ('...' if offset + after < len(text) else '')
+
+def hunks(expected:str, actual:str, prefix:int, suffix:int, context:int=3) -> Iterator[List[str]]:
+    '''Unified diff hunks of the lines that contain the differing part, with line numbers of the whole values.
+    Long parts are compared MAX_LINES lines at a time and the next lines are read only when more hunks are needed.'''
+    start = expected.rfind('\n', 0, prefix) + 1
+    first_expected = first_actual = expected.count('\n', 0, start)
+    windows:Iterator[Tuple[List[str], List[str]]] = itertools.zip_longest(
+        _windows(expected, start, len(expected) - suffix), _windows(actual, start, len(actual) - suffix), fillvalue=[])
+    for expected_lines, actual_lines in windows:
+        if expected_lines != actual_lines:
+            yield from _hunks(expected_lines, actual_lines, first_expected, first_actual, context)
+        first_expected += len(expected_lines)
+        first_actual += len(actual_lines)
+
+def _hunks(expected_lines:List[str], actual_lines:List[str], first_expected:int, first_actual:int, context:int) -> Iterator[List[str]]:
+    matcher = difflib.SequenceMatcher(None, expected_lines, actual_lines)
+    for group in matcher.get_grouped_opcodes(context):
+        i1, i2, j1, j2 = group[0][1], group[-1][2], group[0][3], group[-1][4]
+        hunk = [f"@@ -{first_expected + i1 + 1},{i2 - i1} +{first_actual + j1 + 1},{j2 - j1} @@"]
+        for tag, a1, a2, b1, b2 in group:
+            if tag == 'equal':
+                hunk.extend(' ' + clip(line) for line in expected_lines[a1:a2])
+                continue
+            hunk.extend('-' + clip(line) for line in expected_lines[a1:a2])
+            hunk.extend('+' + clip(line) for line in actual_lines[b1:b2])
+        yield hunk
+
+def _windows(text:str, start:int, end:int) -> Iterator[List[str]]:
+    # Whole lines from start to the line that contains end, MAX_LINES at a time
+    newline = text.find('\n', end)
+    lines = io.StringIO(text[start:len(text) if newline < 0 else newline], newline='')
+    while True:
+        window = [line[:-1] if line.endswith('\n') else line for line in itertools.islice(lines, MAX_LINES)]
+        if not window:
+            return
+        yield window
@@ -0,0 +1,72 @@
+'''Size and sha256 digest of values that are too big to keep as expectations.'''
+from typing import Iterator, Optional, Union
+import hashlib
+
+CHUNK_SIZE = 1024 * 1024
+
+def is_bytes_like(value:object) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview))
+
+def is_stream(value:object) -> bool:
+    return hasattr(value, 'read') or isinstance(value, Iterator)
+
+def _encoded(chunk:object, value:object) -> Union[bytes, memoryview]:
+    if isinstance(chunk, str):
+        return chunk.encode('utf-8', 'surrogatepass')
+    if is_bytes_like(chunk):
+        return memoryview(chunk).cast('B')  # type: ignore
+    raise _not_digestible(value, chunk)
+
+def _not_digestible(value:object, chunk:object=None) -> AssertionError:
+    if chunk is None:
+        return AssertionError(f"Value of type {type(value).__name__} can not be digested")
+    return AssertionError(f"Value of type {type(value).__name__} can not be digested, it has a chunk of type {type(chunk).__name__}")
+
+
+class ValueDigest:
+    '''Size in bytes and sha256 of a value. Strings are hashed as UTF-8.'''
+
+    def __init__(self, size:Optional[int], sha256:str) -> None:
+        self.size = size
+        self.sha256 = sha256
+
+    @classmethod
+    def of(cls, value:object) -> 'ValueDigest':
+        '''Digest of bytes, a string, a file like object or an iterator of bytes or string
+        chunks. Strings and streams are hashed in chunks without copying them whole.
+        Raises AssertionError for other values.'''
+        sha256 = hashlib.sha256()
+        size = 0
+        for chunk in cls._chunks(value):
+            sha256.update(chunk)
+            size += len(chunk)
+        return cls(size, sha256.hexdigest())
+
+    @staticmethod
+    def _chunks(value:object) -> Iterator[Union[bytes, memoryview]]:
+        if is_bytes_like(value):
+            yield memoryview(value).cast('B')  # type: ignore
+        elif isinstance(value, str):
+            for start in range(0, len(value), CHUNK_SIZE):
+                yield _encoded(value[start:start + CHUNK_SIZE], value)
+        elif hasattr(value, 'read'):
+            chunk = value.read(CHUNK_SIZE)  # type: ignore
+            while chunk:
+                yield _encoded(chunk, value)
+                chunk = value.read(CHUNK_SIZE)  # type: ignore
+        elif isinstance(value, Iterator):
+            for chunk in value:
+                yield _encoded(chunk, value)
+        else:
+            raise _not_digestible(value)
+
+    def __eq__(self, other:object) -> bool:
+        if not isinstance(other, ValueDigest):
+            return NotImplemented
+        return self.sha256 == other.sha256 and (self.size is None or other.size is None or self.size == other.size)
+
+    def __hash__(self) -> int:
+        return hash(self.sha256)
+
+    def __str__(self) -> str:
+        return f"<{self.size} bytes, sha256 {self.sha256}>"
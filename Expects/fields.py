@@ -0,0 +1,62 @@
+'''Targeted access to the public fields of complex values.
+
+Field names are listed per type without evaluating properties and field values
+are fetched one by one, so only the fields that are needed get evaluated.
+'''
+from typing import Dict, Iterator, List, Set, Tuple
+import inspect
+
+MISSING = object()
+
+_JSON_SCALARS = (str, int, float, type(None))
+_JSON_KEYS = (str, int, float, type(None))
+_class_fields:Dict[type, Tuple[str, ...]] = {}
+
+def is_jsonable(value:object) -> bool:
+    '''Whether json.dumps would serialize the value, checked by type without serializing it.'''
+    return _is_jsonable(value, set())
+
+def _is_jsonable(value:object, containers:Set[int]) -> bool:
+    if isinstance(value, _JSON_SCALARS):
+        return True
+    if not isinstance(value, (list, tuple, dict)):
+        return False
+    if id(value) in containers:
+        return False
+    containers.add(id(value))
+    try:
+        if isinstance(value, dict):
+            return all(isinstance(k, _JSON_KEYS) and _is_jsonable(v, containers) for k, v in value.items())
+        return all(_is_jsonable(item, containers) for item in value)
+    finally:
+        containers.discard(id(value))
+
+def _is_field(attribute:object) -> bool:
+    return not (inspect.isroutine(attribute) or isinstance(attribute, (staticmethod, classmethod, type)))
+
+def field_names(value:object) -> List[str]:
+    '''Sorted public field names of the value. Methods are left out.'''
+    cls = type(value)
+    if cls not in _class_fields:
+        _class_fields[cls] = tuple(name for name in dir(cls)
+            if not name.startswith('_') and _is_field(inspect.getattr_static(cls, name, None)))
+    names = set(_class_fields[cls])
+    try:
+        names.update(name for name in vars(value) if not name.startswith('_'))
+    except TypeError:
+        pass
+    return sorted(names)
+
+def field_value(value:object, name:str) -> object:
+    '''Value of the field or MISSING.'''
+    try:
+        return getattr(value, name)
+    except AttributeError:
+        return MISSING
+
+def jsonable_fields(value:object) -> Iterator[Tuple[str, object]]:
+    '''Public fields of the value that have a JSON value.'''
+    for name in field_names(value):
+        val = field_value(value, name)
+        if val is not MISSING and is_jsonable(val):
+            yield name, val
@@ -0,0 +1,206 @@
+'''Value inspector shell of INTERACTIVE mode, imported when a value first fails in it.'''
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, cast
+from cmd import Cmd
+import itertools
+import sys
+from . import Validator, _Log, diffs
+from .fields import jsonable_fields
+from robot.api import logger # type: ignore
+
+
+class _ValueInspector(Cmd):
+    intro = '\n## Value inspector shell. Type help or ? to list commands. ##\n'
+    prompt = 'inspector >> '
+    page_size = 40
+
+    def __init__(self, value:object, expectation_id:str, expectations:List[Dict[str, object]], max_length:Optional[int]=None) -> None:
+        # Robot Framework mangles outputs and inputs
+        self._oldstdin = sys.stdin
+        self._oldstdout = sys.stdout
+        sys.stdin = sys.__stdin__
+        sys.stdout = sys.__stdout__
+        Cmd.__init__(self)
+        self._value = value
+        self._id = expectation_id
+        self._expectations = expectations
+        self._pending:Iterator[str] = iter(())
+        # Values in messages are shortened like in the log, only show and diff page through them
+        self._console = _Log(logger.console, None, max_length)
+        self._validator = Validator(self._console)
+
+    def _page(self, lines:Iterable[str]) -> None:
+        self._pending = iter(lines)
+        self.do_more('')
+
+    def do_more(self, attrs) -> None:
+        'Show the next page of the previous diff or show'
+        lines = list(itertools.islice(self._pending, self.page_size + 1))
+        for line in lines[:self.page_size]:
+            logger.console(line)
+        if len(lines) > self.page_size:
+            self._pending = itertools.chain(lines[self.page_size:], self._pending)
+            logger.console("-- type more for the next page --")
+
+    def postloop(self):
+        sys.stdin = self._oldstdin
+        sys.stdout = self._oldstdout
+
+
+class NotMatchingValueInspector(_ValueInspector):
+
+    def __init__(self, value:object, expectation_id:str, expectations:List[Dict[str, object]], max_length:Optional[int]=None) -> None:
+        _ValueInspector.__init__(self, value, expectation_id, expectations, max_length)
+        self._expected = [e for e in expectations if e["id"] == expectation_id][0]
+        self._has_old_value = 'value' in self._expected
+        self._old_expected_value = self._expected.get('value')
+        self._fields:List[Tuple[str, Dict[str, object]]] = [(field, {'value':val}) for field, val in jsonable_fields(value)]
+
+    def _diff_texts(self) -> Optional[Tuple[str, str, int, int]]:
+        if not self._has_old_value:
+            logger.console("No expected value to compare with")
+            return None
+        expected, actual = diffs.as_text(self._old_expected_value), diffs.as_text(self._value)
+        prefix = diffs.common_prefix(expected, actual)
+        if prefix == len(expected) == len(actual):
+            logger.console("Expected and actual value are equal as text")
+            return None
+        suffix = diffs.common_suffix(expected, actual, prefix)
+        line, column = diffs.location(expected, prefix)
+        logger.console(f"Expected {len(expected)} and actual {len(actual)} chars. Common start {prefix} and end {suffix} chars. "
+                       f"First difference at line {line} column {column}")
+        return expected, actual, prefix, suffix
+
+    def do_diff(self, hunks:str) -> None:
+        'Show diff to expected value. diff <n> shows at most n hunks, 5 by default'
+        texts = self._diff_texts()
+        if texts is None:
+            return
+        limit = int(hunks) if hunks.strip().isdigit() else 5
+        found = itertools.islice(diffs.hunks(*texts), limit + 1)
+        def lines() -> Iterator[str]:
+            for count, hunk in enumerate(found):
+                if count == limit:
+                    yield f"-- stopped after {limit} hunks, use diff <n> for more --"
+                    return
+                yield from hunk
+        self._page(lines())
+
+    def do_first(self, attrs) -> None:
+        'Jump to the first difference to expected value'
+        texts = self._diff_texts()
+        if texts is None:
+            return
+        expected, actual, prefix, _ = texts
+        logger.console(f"Expected:{diffs.window(expected, prefix)}")
+        logger.console(f"Actual:  {diffs.window(actual, prefix)}")
+
+    def do_replace(self, attrs) -> None:
+        'Replace expectation with current value'
+        self._console("Replaced {} with {}", self._old_expected_value, self._value)
+        self._expected['value'] = self._value
+
+    def do_min(self, minvalue:str) -> None:
+        'Set min constraint. Removes value constraint.'
+        min_val = float(minvalue)
+        logger.console(f"Setting min value constraint to {min_val}")
+        if 'value' in self._expected:
+            del self._expected['value']
+        self._expected['min'] = min_val
+
+    def do_max(self, maxvalue:str) -> None:
+        'Set max constraint. Removes value constraint.'
+        max_val = float(maxvalue)
+        logger.console(f"Setting max value constraint to {max_val}")
+        if 'value' in self._expected:
+            del self._expected['value']
+        self._expected['max'] = max_val
+
+    def do_startswith(self, value:str) -> None:
+        'Set startswith constraint. Removes value constraint.'
+        logger.console(f"Setting startswith constraint to '{value}'")
+        if 'value' in self._expected:
+            del self._expected['value']
+        self._expected['startswith'] = value
+
+    def do_regex(self, value:str) -> None:
+        'Set regex match constraint. Removes value constraint.'
+        logger.console(f"Setting regex constraint to '{value}'")
+        if 'value' in self._expected:
+            del self._expected['value']
+        self._expected['regex'] = value
+
+    def do_field(self, line:str) -> None:
+        'Set field specific expectation.'
+        parts = line.split(None, 2)
+        if not parts:
+            logger.console("field command needs a field name")
+            return
+        name:str = parts[0]
+        matching = [v for f,v in self._fields if f == name]
+        if not matching:
+            logger.console("Unknown field name '{name}'")
+            return
+        if 'fields' not in self._expected:
+            self._expected['fields'] = {}
+        fields = cast(Dict[str, Dict[str, object]], self._expected['fields'])
+        if name not in fields:
+            fields[name] = {}
+        if len(parts) == 1:
+            fields[name] = matching[0]
+            self._console("Expecting field: {} to have value {}", name, fields[name]['value'])
+            return
+        if parts[1] != 'value' and 'value' in fields[name]:
+            del fields[name]['value']
+        fields[name][parts[1]] = parts[2]
+        logger.console(f"Expecting field: {name} to match {parts[1]} with {parts[2]}")
+
+    def complete_field(self, text:str, line:str, begidx:int, endidx:int) -> List[str]:
+        completes:List[str] = []
+        for field, _ in self._fields:
+            if field.startswith(text):
+                completes.append(field)
+        a = [s.strip() for s in line.split(None, 2)]
+        if len(a) >= 2 and a[1] in [f[0] for f in self._fields]:
+            completes.clear()
+            for expect in ['max', 'min', 'startswith', 'regex', 'value']:
+                if expect.startswith(text):
+                    completes.append(expect)
+        return completes
+
+    def do_show(self, field:str) -> None:
+        'Show value of the current object or a field a page at a time'
+        if field:
+            for f, val in self._fields:
+                if f == field:
+                    self._page(itertools.chain([f"Field:{field}", f"type:{type(val['value'])}", "value:"],
+                                               diffs.iter_lines(str(val['value']))))
+            return
+        lines:Iterable[str] = itertools.chain([f"type:{type(self._value)}", "Value:"], diffs.iter_lines(str(self._value)))
+        if self._fields:
+            lines = itertools.chain(lines, ['Fields:'], ('  '+field for field, _ in self._fields))
+        self._page(lines)
+
+    def complete_show(self, text:str, line:str, begidx:int, endidx:int) -> List[str]:
+        completes:List[str] = []
+        for field, _ in self._fields:
+            if field.startswith(text):
+                completes.append(field)
+        return completes
+
+    def do_test(self, attrs) -> None:
+        'Test if values match the constraints'
+        self._console("Expecting: {}", self._expected)
+        if self._validator.validate(self._value, self._expected):
+            logger.console("PASSED. New value matches constraints")
+        else:
+            logger.console("FAILED. New value did not match constraints")
+        if not self._has_old_value:
+            return
+        if self._validator.validate(self._old_expected_value, self._expected):
+            logger.console("PASSED. Old value matches constraints")
+        else:
+            logger.console("FAILED. Old value did not match constraints")
+
+    def do_quit(self, args) -> bool:
+        'Quit Value Inspector and store new expectations'
+        return True
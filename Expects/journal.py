@@ -0,0 +1,91 @@
+'''Per process journals of trained values.
+
+Parallel workers sharing an expectations file write the values they train with
+to journal files of their own instead of rewriting the expectations file.
+expects-merge later replays the journals into the expectations file with the
+library settings recorded on the first line of each journal.
+'''
+from typing import Dict, IO, Iterator, List, Optional, cast
+import json
+import os
+import socket
+import types
+from .blobs import REFERENCE_KEY, Blob, BlobStore
+from .digests import ValueDigest
+from .fields import is_jsonable, jsonable_fields
+
+SUFFIX = '.jsonl'
+# First line of a journal has the library settings that training with it needs
+SETTINGS_KEY = 'settings'
+
+def directory_for(expectations_file:str) -> str:
+    return os.path.splitext(expectations_file)[0] + '.journal'
+
+def encode(value:object, blobs:Optional[BlobStore]=None) -> Dict[str, object]:
+    if blobs is not None and blobs.stores(value):
+        return {'blob':blobs.store(cast(str, value))[REFERENCE_KEY]}
+    if isinstance(value, ValueDigest):
+        return {'digest':[value.size, value.sha256]}
+    if is_jsonable(value):
+        return {'value':value}
+    return {'fields':dict(jsonable_fields(value))}
+
+def decode(entry:Dict[str, object], blobs:Optional[BlobStore]=None) -> object:
+    if 'blob' in entry:
+        return Blob(cast(str, entry['blob']), blobs).value
+    if 'digest' in entry:
+        size, sha256 = cast(List[object], entry['digest'])
+        return ValueDigest(cast(Optional[int], size), cast(str, sha256))
+    if 'fields' in entry:
+        return types.SimpleNamespace(**entry['fields'])  # type: ignore
+    return entry['value']
+
+def journal_files(directory:str) -> List[str]:
+    '''Journal files in the directory in the order they are merged.'''
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(SUFFIX)]
+
+def read(path:str) -> Iterator[Dict[str, object]]:
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                return  # Partially written by a worker that did not finish
+            entry = json.loads(line)
+            if SETTINGS_KEY not in entry:
+                yield entry
+
+def settings(path:str) -> Dict[str, object]:
+    '''Library settings the journal was written with, empty for journals without them.'''
+    with open(path, 'r') as f:
+        line = f.readline()
+    if not line.endswith('\n'):
+        return {}
+    return cast(Dict[str, object], json.loads(line).get(SETTINGS_KEY, {}))
+
+
+class Journal:
+    '''Journal file of one process. Created when the first entry is recorded.
+    Strings long enough for the blob store are recorded by digest.'''
+
+    def __init__(self, directory:str, blobs:Optional[BlobStore]=None, settings:Optional[Dict[str, object]]=None) -> None:
+        self.directory = directory
+        self._blobs = blobs
+        self._settings = settings
+        self._file:Optional[IO[str]] = None
+
+    def record(self, section:str, name:str, expectation_id:str, position:int, value:object) -> None:
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            filename = f"{socket.gethostname()}-{os.getpid()}-{os.urandom(4).hex()}{SUFFIX}"
+            self._file = open(os.path.join(self.directory, filename), 'w')
+            if self._settings:
+                self._file.write(json.dumps({SETTINGS_KEY:self._settings}, separators=(',', ':'), sort_keys=True) + '\n')
+        entry:Dict[str, object] = {'section':section, 'name':name, 'id':expectation_id, 'position':position}
+        entry.update(encode(value, self._blobs))
+        self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
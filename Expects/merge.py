@@ -0,0 +1,92 @@
+'''expects-merge and expects-train fold journals into their expectations files.
+
+expects-merge replays journal entries one by one through the same training logic
+that should_be_as_expected uses. expects-train groups the entries by expectation
+and resolves each expectation from all of its values at once, which suits the
+journals of RECORD mode. Journals are read in file name order, so the same
+journals always give the same result. Expectations are trained and written with the
+library settings, like blob_threshold and compact, that the journals were recorded with.
+'''
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import argparse
+import os
+import sys
+from . import Expects, journal, shards
+
+def merge(expectations_file:str, keep:bool=False, batch:bool=False) -> int:
+    '''Train the expectations file with its journals. Returns the number of entries
+    that could not be trained with. Journals are removed unless keep is set or some entry failed.'''
+    directory = journal.directory_for(expectations_file)
+    files = journal.journal_files(directory)
+    if not files:
+        return 0
+    library = Expects('TRAINING', sharded=os.path.isdir(shards.directory_for(expectations_file)), **_settings(files))
+    library._load(expectations_file)
+    failures = 0
+    entries = [(path, entry) for path in files for entry in journal.read(path)]
+    groups = _by_expectation(entries) if batch else [[item] for item in entries]
+    for group in groups:
+        path, entry = group[0]
+        try:
+            if batch:
+                library._train_batch([entry for _, entry in group])
+            else:
+                library._replay(entry)
+        except AssertionError as error:
+            print(f"{path}: {entry['section']} '{entry['name']}' id '{entry['id']}': {error}", file=sys.stderr)
+            failures += 1
+    if library._dirty:
+        library._save()
+    if not keep and not failures:
+        for path in files:
+            os.remove(path)
+        if not os.listdir(directory):
+            os.rmdir(directory)
+        if library._shards is not None:
+            library._shards.load_all(library.expectations)
+        if library._blobs is not None:
+            library._blobs.prune(library._blobs.externalize(library.expectations))
+    return failures
+
+def _settings(files:List[str]) -> Dict[str, Any]:
+    '''Library settings of the first journal that has them.'''
+    for path in files:
+        settings = journal.settings(path)
+        if settings:
+            return {key:value for key, value in settings.items() if key in _SETTINGS}
+    return {}
+
+_SETTINGS = ('compact', 'examples', 'blob_threshold', 'compress_blobs', 'tolerance')
+
+def _by_expectation(entries:List[Tuple[str, Dict[str, object]]]) -> List[List[Tuple[str, Dict[str, object]]]]:
+    groups:Dict[Tuple[object, object, object], List[Tuple[str, Dict[str, object]]]] = {}
+    for path, entry in entries:
+        groups.setdefault((entry['section'], entry['name'], entry['id']), []).append((path, entry))
+    return list(groups.values())
+
+def _expectation_files(paths:List[str]) -> Iterator[str]:
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirnames, _ in os.walk(path):
+            for dirname in sorted(dirnames):
+                if dirname.endswith('_expects.journal'):
+                    yield os.path.join(root, dirname[:-len('.journal')] + '.json')
+
+def main(argv:Optional[List[str]]=None, batch:bool=False) -> int:
+    parser = argparse.ArgumentParser(prog='expects-train' if batch else 'expects-merge',
+                                     description='Train expectations files with their journals.')
+    parser.add_argument('paths', nargs='+', help='expectations files or directories to search for journals')
+    parser.add_argument('--keep', action='store_true', help='keep journals after training')
+    args = parser.parse_args(argv)
+    failures = 0
+    for expectations_file in _expectation_files(args.paths):
+        failures += merge(expectations_file, args.keep, batch)
+    return 1 if failures else 0
+
+def train(argv:Optional[List[str]]=None) -> int:
+    return main(argv, batch=True)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+'''Path addressed expectations for dicts, lists and JSON payloads.
+
+Paths look like $.items[*].id where .name and ["any key"] select dict keys,
+[3] selects a list item and [*] selects every list item.
+'''
+from typing import Dict, Generic, Iterator, List, Mapping, Tuple, TypeVar, Union, cast
+import json
+import re
+from .fields import MISSING
+
+T = TypeVar('T')
+Segment = Union[str, int, None]  # None is [*]
+
+# Keys of the expectation of a list collected under [*]
+SHAPE_KEYS = {'type', 'nonempty'}
+
+_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_SEGMENT = re.compile(r'\.([A-Za-z_][A-Za-z0-9_]*)|\[(\*|\d+|"(?:[^"\\]|\\.)*")\]')
+
+def parse(path:str) -> List[Segment]:
+    if not path.startswith('$'):
+        raise ValueError(f"Path '{path}' does not start with $")
+    segments:List[Segment] = []
+    position = 1
+    while position < len(path):
+        match = _SEGMENT.match(path, position)
+        if not match:
+            raise ValueError(f"Invalid path '{path}' at position {position}")
+        name, selector = match.groups()
+        if name is not None:
+            segments.append(name)
+        elif selector == '*':
+            segments.append(None)
+        elif selector.startswith('"'):
+            segments.append(json.loads(selector))
+        else:
+            segments.append(int(selector))
+        position = match.end()
+    return segments
+
+def key_path(path:str, key:str) -> str:
+    if _NAME.fullmatch(key):
+        return f"{path}.{key}"
+    return f"{path}[{json.dumps(key)}]"
+
+def collect(values:List[object]) -> Tuple[Dict[str, List[object]], Dict[str, Dict[str, object]]]:
+    '''Values at the leaf paths shared by all the values and the shapes of the lists on the way.
+    Dict keys are followed when all the dicts have them and items of all lists are collected
+    together under [*]. The list itself is then expected to be a list, and to have items when
+    all of them had.'''
+    collected:Dict[str, List[object]] = {}
+    shapes:Dict[str, Dict[str, object]] = {}
+    _collect('$', values, collected, shapes)
+    return collected, shapes
+
+def _collect(path:str, values:List[object], collected:Dict[str, List[object]], shapes:Dict[str, Dict[str, object]]) -> None:
+    if all(isinstance(v, Mapping) and all(isinstance(k, str) for k in v) for v in values):
+        dicts = [cast(Mapping[str, object], v) for v in values]
+        keys = [key for key in dicts[0] if all(key in d for d in dicts[1:])]
+        if keys:
+            for key in keys:
+                _collect(key_path(path, key), [d[key] for d in dicts], collected, shapes)
+            return
+    elif all(isinstance(v, (list, tuple)) for v in values):
+        items = [item for v in values for item in cast(List[object], v)]
+        if items:
+            shapes[path] = {'type':'list', 'nonempty':True} if all(values) else {'type':'list'}
+            _collect(f"{path}[*]", items, collected, shapes)
+            return
+    collected[path] = values
+
+def is_shape(expected:Mapping[str, object]) -> bool:
+    '''Whether the expectation of a path only expects the shape of a list.'''
+    return 'type' in expected and set(expected) <= SHAPE_KEYS
+
+def root_type(expected_paths:Mapping[str, object]) -> type:
+    '''Container type the paths lead into, dict for $.name and $["key"] and list for $[0] and $[*].'''
+    first = parse(next(iter(expected_paths)))
+    return dict if first and isinstance(first[0], str) else list
+
+def is_container(value:object, container:type) -> bool:
+    return isinstance(value, Mapping if container is dict else (list, tuple))
+
+
+class _Node(Generic[T]):
+
+    def __init__(self) -> None:
+        self.items:List[Tuple[str, T]] = []
+        self.children:Dict[Segment, '_Node[T]'] = {}
+
+
+class PathTree(Generic[T]):
+    '''Items by path compiled into a tree that is walked together with a value,
+    so the value is visited only where some path leads.'''
+
+    def __init__(self, items:Mapping[str, T]) -> None:
+        self._root:_Node[T] = _Node()
+        for path, item in items.items():
+            node = self._root
+            for segment in parse(path):
+                node = node.children.setdefault(segment, _Node())
+            node.items.append((path, item))
+
+    def walk(self, value:object) -> Iterator[Tuple[str, T, object]]:
+        '''Yields path, item and the value at the path or MISSING for every item.'''
+        return self._walk(self._root, value)
+
+    def _walk(self, node:_Node[T], value:object) -> Iterator[Tuple[str, T, object]]:
+        for path, item in node.items:
+            yield path, item, value
+        for segment, child in node.children.items():
+            if segment is None and isinstance(value, (list, tuple)):
+                for element in value:
+                    yield from self._walk(child, element)
+            elif isinstance(segment, int) and isinstance(value, (list, tuple)) and segment < len(value):
+                yield from self._walk(child, value[segment])
+            elif isinstance(segment, str) and isinstance(value, Mapping) and segment in value:
+                yield from self._walk(child, value[segment])
+            else:
+                yield from self._missing(child)
+
+    def _missing(self, node:_Node[T]) -> Iterator[Tuple[str, T, object]]:
+        for path, item in node.items:
+            yield path, item, MISSING
+        for child in node.children.values():
+            yield from self._missing(child)
@@ -0,0 +1,67 @@
+'''Expectations stored as a file per test and keyword, loaded when the test or keyword is first checked.
+
+yoursuite_expects.shards/index.json maps the names of each section to their shard files and
+every shard is a list of the expectations of one test or keyword, as in yoursuite_expects.json.
+'''
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import hashlib
+import json
+import os
+
+SUFFIX = '.shards'
+INDEX = 'index.json'
+SECTIONS = ('Tests', 'Keywords')
+
+Expectations = Dict[str, Dict[str, List[Dict[str, object]]]]
+Writer = Callable[[str, object], None]
+
+def directory_for(expectations_file:str) -> str:
+    base, _ = os.path.splitext(expectations_file)
+    return base + SUFFIX
+
+def shard_file(section:str, name:str) -> str:
+    return f"{section[0].lower()}-{hashlib.sha1(name.encode('utf-8')).hexdigest()[:16]}.json"
+
+
+class ShardStore:
+
+    def __init__(self, directory:str, write:Writer) -> None:
+        self.directory = directory
+        self._write = write
+        self._index:Dict[str, Dict[str, str]] = {section:{} for section in SECTIONS}
+        path = os.path.join(directory, INDEX)
+        if os.path.isfile(path):
+            with open(path) as f:
+                self._index.update(json.load(f))
+
+    def exists(self) -> bool:
+        return os.path.isfile(os.path.join(self.directory, INDEX))
+
+    def load(self, section:str, name:str) -> Optional[List[Dict[str, object]]]:
+        filename = self._index[section].get(name)
+        if filename is None:
+            return None
+        with open(os.path.join(self.directory, filename)) as f:
+            return json.load(f)
+
+    def load_all(self, expectations:Expectations) -> None:
+        '''Load the shards that are not in expectations yet.'''
+        for section in SECTIONS:
+            for name in self._index[section]:
+                if name not in expectations[section]:
+                    expectations[section][name] = self.load(section, name) or []
+
+    def save(self, expectations:Expectations, changed:Set[Tuple[str, str]]) -> None:
+        '''Write the changed shards and the index when it has new names.'''
+        if not changed:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        added = False
+        for section, name in sorted(changed):
+            filename = self._index[section].get(name)
+            if filename is None:
+                filename = self._index[section][name] = shard_file(section, name)
+                added = True
+            self._write(os.path.join(self.directory, filename), expectations[section].get(name, []))
+        if added or not self.exists():
+            self._write(os.path.join(self.directory, INDEX), self._index)
@@ -0,0 +1,117 @@
+'''Expectations of keywords in resource files shared by all suites that run them.
+
+With Library  Expects  shared_keywords=<directory> the expectations of keywords from resource
+files are stored in the directory by the source and name of the keyword instead of in the
+Keywords section of every suite. The directory is laid out like yoursuite_expects.shards.
+
+The store of a directory is opened once per process. Keywords are loaded when first checked
+and kept in a cache of CACHE_SIZE keywords. Changed keywords stay in memory and are written
+once when the process exits, merged by expectation id with what other processes wrote.
+Processes take turns to merge and write by locking the file LOCK in the directory.
+'''
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
+import atexit
+import os
+import sys
+from . import _index_by_id
+from .shards import ShardStore, Writer
+
+CACHE_SIZE = 256
+SECTION = 'Keywords'
+LOCK = '.lock'
+
+Key = Tuple[str, str]  # Source and name of a keyword
+Entry = Tuple[List[Dict[str, object]], Dict[str, Dict[str, object]]]  # Expectations and their index by id
+
+_STORES:Dict[str, 'SharedKeywords'] = {}
+
+def open_store(directory:str, write:Writer) -> 'SharedKeywords':
+    '''The store of directory in this process, written when the process exits.'''
+    directory = os.path.abspath(directory)
+    store = _STORES.get(directory)
+    if store is None:
+        store = _STORES[directory] = SharedKeywords(directory, write)
+        atexit.register(store.save)
+    return store
+
+def source_name(directory:str, source:Optional[str], resource:str) -> str:
+    '''Path of the resource file relative to the directory of the store, or the name
+    of the resource when Robot does not give the path.'''
+    if not source:
+        return resource
+    return os.path.relpath(source, os.path.dirname(os.path.abspath(directory))).replace(os.sep, '/')
+
+def _shard_name(key:Key) -> str:
+    return f'{key[0]}::{key[1]}'
+
+@contextmanager
+def _locked(directory:str) -> Iterator[None]:
+    '''Holds the lock of the directory, waiting while another process holds it.'''
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK), 'a+b') as f:
+        if sys.platform == 'win32':
+            import msvcrt
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after 10 seconds
+                    pass
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class SharedKeywords:
+
+    def __init__(self, directory:str, write:Writer, cache_size:int=CACHE_SIZE) -> None:
+        self.directory = directory
+        self._write = write
+        self._cache_size = cache_size
+        self._shards = ShardStore(directory, write)
+        self._cache:'OrderedDict[Key, Entry]' = OrderedDict()
+        # Changed keywords are never evicted before they are written
+        self._changed:Dict[Key, Entry] = {}
+
+    def get(self, source:str, name:str) -> Entry:
+        key = (source, name)
+        entry = self._changed.get(key) or self._cache.get(key)
+        if entry is None:
+            expectations = self._shards.load(SECTION, _shard_name(key)) or []
+            entry = (expectations, _index_by_id(expectations))
+            self._cache[key] = entry
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        elif key in self._cache:
+            self._cache.move_to_end(key)
+        return entry
+
+    def changed(self, source:str, name:str) -> None:
+        self._changed[(source, name)] = self.get(source, name)
+
+    def save(self) -> None:
+        '''Write the changed keywords. Expectations that other processes have written
+        since are kept unless this process has one with the same id.'''
+        if not self._changed:
+            return
+        with _locked(self.directory):
+            latest = ShardStore(self.directory, self._write)
+            merged:Dict[str, List[Dict[str, object]]] = {}
+            for key, (expectations, index) in sorted(self._changed.items()):
+                written = latest.load(SECTION, _shard_name(key)) or []
+                merged[_shard_name(key)] = expectations + [exp for exp in written if exp.get('id') not in index]
+            latest.save({SECTION:merged}, {(SECTION, name) for name in merged})
+        self._shards = latest
+        self._changed.clear()
@@ -1,26 +1,512 @@
-from typing import List, Pattern
+from typing import Dict, List, Optional, Pattern, Tuple, Union, cast
+import bisect
 import re
-from difflib import SequenceMatcher
+import string
 
 def longest_substring(str1:str, str2:str) -> str:
-    match = SequenceMatcher(None, str1, str2).find_longest_match(0, len(str1), 0, len(str2))
-    return str1[match.a: match.a + match.size]
+    '''Longest common substring. Of equally long ones the one found first in str1 is
+    returned, like with SequenceMatcher.find_longest_match.'''
+    start, size = _longest_match(str1, 0, len(str1), str2, 0, len(str2))
+    return str1[start:start + size]
 
 def find_matching_parts(s1:str, s2:str) -> List[str]:
-    if s1 == "" or s2 == "":
-        return [] if s1 == s2 else [""]
-    splitter = longest_substring(s1, s2)
-    if splitter == "":
-        return [""]
-    s1a, s1b = s1.split(splitter, 1)
-    s2a, s2b = s2.split(splitter, 1)
-    return find_matching_parts(s1a, s2a) + [splitter] + find_matching_parts(s1b, s2b)
+    '''Common parts of the strings in order with "" in place of differing parts.
+    Splits both strings on their longest common substring and repeats for the
+    parts before and after it.'''
+    return _matching_parts(s1, [(0, len(s1))], s2)
+
+def combine(lst:List[str], s1:str) -> List[str]:
+    '''Parts common to the parts in lst and s1. A "" part in lst is a gap that
+    common parts never span.'''
+    text:List[str] = []
+    segments:List[Tuple[int, int]] = []
+    position = 0
+    for part in lst:
+        if part == "":
+            # One placeholder character keeps the gap in place. It is never matched.
+            text.append("\0")
+            position += 1
+        elif segments and segments[-1][1] == position:
+            text.append(part)
+            segments[-1] = (segments[-1][0], position + len(part))
+            position += len(part)
+        else:
+            text.append(part)
+            segments.append((position, position + len(part)))
+            position += len(part)
+    return _matching_parts(''.join(text), segments, s1)
+
+def _matching_parts(a:str, segments:List[Tuple[int, int]], b:str) -> List[str]:
+    '''find_matching_parts for a with common parts limited to the given segments of a.'''
+    parts:List[str] = []
+    segment_ends = [end for _, end in segments]
+    stack:List[Union[str, Tuple[int, int, int, int]]] = [(0, len(a), 0, len(b))]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+            continue
+        alo, ahi, blo, bhi = item
+        if alo == ahi or blo == bhi:
+            if ahi - alo != bhi - blo:
+                parts.append("")
+            continue
+        start, size = alo, 0
+        for index in range(bisect.bisect_right(segment_ends, alo), len(segments)):
+            lo, hi = max(segments[index][0], alo), min(segments[index][1], ahi)
+            if lo >= ahi:
+                break
+            if hi - lo > size:
+                found_start, found_size = _longest_match(a, lo, hi, b, blo, bhi)
+                if found_size > size:
+                    start, size = found_start, found_size
+        if size == 0:
+            parts.append("")
+            continue
+        splitter = a[start:start + size]
+        found = b.find(splitter, blo, bhi)
+        stack.append((start + size, ahi, found + size, bhi))
+        stack.append(splitter)
+        stack.append((alo, start, blo, found))
+    return parts
+
+# Strings shorter than this are matched with the suffix automaton only
+_ANCHOR_MIN_LENGTH = 1024
+# Anchor passes are given up for the suffix automaton after these limits
+_ANCHOR_MIN_BLOCK = 16
+_ANCHOR_MAX_BLOCKS = 256
+_ANCHOR_MAX_OCCURRENCES = 4096
+
+def _longest_match(a:str, alo:int, ahi:int, b:str, blo:int, bhi:int) -> Tuple[int, int]:
+    '''Start in a and size of the longest common substring of a[alo:ahi] and b[blo:bhi].
+
+    Similar strings share long substrings. Those are found with str.find by searching
+    for blocks of a, taken at every s characters, in b and extending every found block
+    as far as a and b match. Any common substring of at least 2*s-1 characters
+    contains a block, so the result is exact once the longest found is that long.
+    Block size is halved until then, or until the suffix automaton is cheaper.
+    '''
+    if min(ahi - alo, bhi - blo) < _ANCHOR_MIN_LENGTH:
+        return _automaton_match(a, alo, ahi, b, blo, bhi)
+    best:Tuple[int, int] = (alo, 0)
+    block = 1 << (min(ahi - alo, bhi - blo).bit_length() - 1)
+    while block >= _ANCHOR_MIN_BLOCK and (ahi - alo) // block <= _ANCHOR_MAX_BLOCKS:
+        anchored = _anchored_match(a, alo, ahi, b, blo, bhi, block, best)
+        if anchored is None:
+            break
+        best = anchored
+        if best[1] >= 2 * block - 1:
+            return best
+        block //= 2
+    return _automaton_match(a, alo, ahi, b, blo, bhi)
+
+def _anchored_match(a:str, alo:int, ahi:int, b:str, blo:int, bhi:int, block:int,
+                    best:Tuple[int, int]) -> Optional[Tuple[int, int]]:
+    best_start, best_size = best
+    occurrences = 0
+    extended:Dict[int, int] = {}  # diagonal -> end in a of the match found on it
+    for start in range(alo, ahi - block + 1, block):
+        needle = a[start:start + block]
+        found = b.find(needle, blo, bhi)
+        while found >= 0:
+            occurrences += 1
+            if occurrences > _ANCHOR_MAX_OCCURRENCES:
+                return None
+            diagonal = found - start
+            if extended.get(diagonal, -1) < start:
+                before = _common_suffix_length(a, alo, start, b, blo, found)
+                after = _common_prefix_length(a, start + block, ahi, b, found + block, bhi)
+                extended[diagonal] = start + block + after
+                size = before + block + after
+                if size > best_size or (size == best_size and start - before < best_start):
+                    best_start, best_size = start - before, size
+            found = b.find(needle, found + 1, bhi)
+    return best_start, best_size
+
+def _common_prefix_length(a:str, i:int, ahi:int, b:str, j:int, bhi:int) -> int:
+    limit = min(ahi - i, bhi - j)
+    matching, step = 0, 1
+    while matching < limit:
+        end = min(matching + step, limit)
+        if a[i + matching:i + end] != b[j + matching:j + end]:
+            break
+        matching, step = end, step * 2
+    else:
+        return matching
+    mismatch = end
+    while mismatch - matching > 1:
+        middle = (matching + mismatch) // 2
+        if a[i + matching:i + middle] == b[j + matching:j + middle]:
+            matching = middle
+        else:
+            mismatch = middle
+    return matching
+
+def _common_suffix_length(a:str, alo:int, i:int, b:str, blo:int, j:int) -> int:
+    limit = min(i - alo, j - blo)
+    matching, step = 0, 1
+    while matching < limit:
+        end = min(matching + step, limit)
+        if a[i - end:i - matching] != b[j - end:j - matching]:
+            break
+        matching, step = end, step * 2
+    else:
+        return matching
+    mismatch = end
+    while mismatch - matching > 1:
+        middle = (matching + mismatch) // 2
+        if a[i - middle:i - matching] == b[j - middle:j - matching]:
+            matching = middle
+        else:
+            mismatch = middle
+    return matching
+
+def _automaton_match(a:str, alo:int, ahi:int, b:str, blo:int, bhi:int) -> Tuple[int, int]:
+    '''Longest common substring with a suffix automaton of b[blo:bhi] in linear time.'''
+    link:List[int] = [-1]
+    length:List[int] = [0]
+    transitions:List[Dict[str, int]] = [{}]
+    last = 0
+    for c in b[blo:bhi]:
+        current = len(length)
+        link.append(-1)
+        length.append(length[last] + 1)
+        transitions.append({})
+        state = last
+        while state != -1 and c not in transitions[state]:
+            transitions[state][c] = current
+            state = link[state]
+        if state == -1:
+            link[current] = 0
+        else:
+            target = transitions[state][c]
+            if length[state] + 1 == length[target]:
+                link[current] = target
+            else:
+                clone = len(length)
+                link.append(link[target])
+                length.append(length[state] + 1)
+                transitions.append(dict(transitions[target]))
+                while state != -1 and transitions[state].get(c) == target:
+                    transitions[state][c] = clone
+                    state = link[state]
+                link[target] = link[current] = clone
+        last = current
+    best_end, best_size = alo, 0
+    state, size = 0, 0
+    for i in range(alo, ahi):
+        c = a[i]
+        while state and c not in transitions[state]:
+            state = link[state]
+            size = length[state]
+        if c in transitions[state]:
+            state = transitions[state][c]
+            size += 1
+            if size > best_size:
+                best_end, best_size = i + 1, size
+    return best_end - best_size, best_size
 
 def regexpify(lst:List[str]) -> Pattern[str]:
     return re.compile('^'+''.join(re.escape(s) if s != "" else '.*' for s in lst)+'$')
 
-def combine(lst:List[str], s1:str) -> List[str]:
-    return find_matching_parts(''.join(l if l != '' else 'ö' for l in lst), s1)
+_REGEX_SPECIALS = set('.^$*+?{}[]|()\\')
+_ESCAPED_CLASSES = set(string.ascii_letters + string.digits)
+
+# Classes a gap is typed with, narrowest first. generalize takes the first that matches
+# all gap contents. Hex classes need contents that look like hex: at least _HEX_MIN_LENGTH
+# characters, or mixed digits and letters of one length, so that words like cafe or b1a1 stay words.
+_GAP_CLASSES = [r'\d', '[0-9a-f]', '[0-9A-F]', '[0-9a-fA-F]', r'\w', '.']
+_HEX_MIN_LENGTH = 8
+# Fixed length gaps of a pattern that has a regex at once need at least this many characters in all
+_TOKEN_MIN_LENGTH = 6
+_CLASS_CONTENTS = {cls:re.compile(f'(?:{cls})*') for cls in _GAP_CLASSES}
+_SUBCLASSES = {r'\d':{r'\d'}, '[0-9a-f]':{r'\d', '[0-9a-f]'}, '[0-9A-F]':{r'\d', '[0-9A-F]'},
+               '[0-9a-fA-F]':{r'\d', '[0-9a-f]', '[0-9A-F]', '[0-9a-fA-F]'},
+               r'\w':set(_GAP_CLASSES[:-1]), '.':set(_GAP_CLASSES)}
+_GAP_LENGTH = re.compile(r'\{(\d+)\}')
+
+def _gap_at(pattern:str, start:int, end:int) -> Optional[Tuple[str, int, Optional[int], int]]:
+    '''Class, minimum and maximum length and end of a gap like \\d{4}, \\w+ or .* at start.'''
+    for cls in sorted(_GAP_CLASSES, key=len, reverse=True):
+        if not pattern.startswith(cls, start, end):
+            continue
+        i = start + len(cls)
+        if i < end and pattern[i] in '*+':
+            return cls, int(pattern[i] == '+'), None, i + 1
+        if cls == '.':
+            return None
+        length = _GAP_LENGTH.match(pattern, i, end)
+        if length:
+            return cls, int(length.group(1)), int(length.group(1)), length.end()
+        return cls, 1, 1, i
+    return None
+
+def parse_gaps(pattern:str) -> Optional[Tuple[List[str], List[str]]]:
+    '''Parts with "" in place of gaps and the gaps of a pattern created by regexpify or generalize.
+    Returns None when pattern is not literals with gaps.'''
+    if len(pattern) < 2 or pattern[0] != '^' or pattern[-1] != '$':
+        return None
+    parts:List[str] = []
+    gaps:List[str] = []
+    literal:List[str] = []
+    i, end = 1, len(pattern) - 1
+    while i < end:
+        c = pattern[i]
+        gap = _gap_at(pattern, i, end) if c in '\\[.' else None
+        if gap:
+            if literal:
+                parts.append(''.join(literal))
+                literal = []
+            parts.append('')
+            gaps.append(pattern[i:gap[3]])
+            i = gap[3]
+        elif c == '\\':
+            if i + 1 == end or pattern[i+1] in _ESCAPED_CLASSES:
+                return None
+            literal.append(pattern[i+1])
+            i += 2
+        elif c in _REGEX_SPECIALS:
+            return None
+        else:
+            literal.append(c)
+            i += 1
+    if literal:
+        parts.append(''.join(literal))
+    return parts, gaps
+
+def parse_regexpified(pattern:str) -> Optional[List[str]]:
+    '''Inverse of regexpify. Returns None when pattern is not literals with .* gaps.'''
+    parsed = parse_gaps(pattern)
+    if parsed is None or any(gap != '.*' for gap in parsed[1]):
+        return None
+    return parsed[0]
+
+def has_typed_gaps(pattern:str) -> bool:
+    parsed = parse_gaps(pattern)
+    return parsed is not None and any(gap != '.*' for gap in parsed[1])
+
+def has_only_token_gaps(pattern:str) -> bool:
+    '''Whether pattern has gaps and all of them are digits, hex or word tokens of a fixed length
+    that together are at least _TOKEN_MIN_LENGTH characters, like timestamps, uuids and session ids.'''
+    parsed = parse_gaps(pattern)
+    if parsed is None or not parsed[1]:
+        return False
+    total = 0
+    for gap in parsed[1]:
+        cls, low, high, _ = cast(Tuple[str, int, Optional[int], int], _gap_at(gap, 0, len(gap)))
+        if cls == '.' or low != high or (cls == r'\w' and low < _HEX_MIN_LENGTH):
+            return False
+        total += low
+    return total >= _TOKEN_MIN_LENGTH
+
+def gap_fillers(parts:List[str], value:str) -> Optional[List[str]]:
+    '''What each "" gap of parts matches in value, or None when value does not match the parts.
+    Like in GapPattern, every literal part is found first after the previous one.'''
+    if value.endswith('\n') and not (parts and parts[-1].endswith('\n')):
+        value = value[:-1]
+    fillers:List[str] = []
+    position, gap = 0, False
+    for index, part in enumerate(parts):
+        if part == '':
+            gap = True
+            continue
+        if index == len(parts) - 1:
+            found = len(value) - len(part) if value.endswith(part) else -1
+        else:
+            found = value.find(part, position) if gap else position
+        if found < position or not value.startswith(part, found):
+            return None
+        if gap:
+            fillers.append(value[position:found])
+        elif found != position:
+            return None
+        position, gap = found + len(part), False
+    if gap:
+        fillers.append(value[position:])
+    elif position != len(value):
+        return None
+    return None if any('\n' in filler for filler in fillers) else fillers
+
+Segment = Union[str, List[str]]  # A literal part or what a gap contains in each value
+
+def generalize(parts:List[str], values:List[str], gaps:Optional[List[str]]=None) -> str:
+    '''Regex of parts where every gap is typed by the narrowest class and length that matches
+    what it contains in all values, like \\d{4}, [0-9a-f]{32} or \\w+ instead of .*.
+
+    Without gaps, values that have the same words and separators are compared word by word,
+    so that 10:42 and 11:07 become \\d{2}:\\d{2} and not 1.*:.*. Otherwise common characters
+    next to or between gaps that belong to the same token are moved to the gap.
+    With gaps, parts are kept and each gap is only widened from the given one.
+    '''
+    segments = _token_segments(values) if gaps is None else None
+    if segments is None:
+        rows = [gap_fillers(parts, value) for value in values]
+        if not values or any(row is None for row in rows):
+            return regexpify(parts).pattern
+        columns = iter([list(column) for column in zip(*cast(List[List[str]], rows))])
+        segments = [part if part != '' else next(columns) for part in parts]
+    if gaps is not None:
+        typed = iter(gaps)
+        return '^' + ''.join(re.escape(s) if isinstance(s, str) else _typed_gap(s, next(typed)) for s in segments) + '$'
+    segments = _extend_tokens(_join_tokens(segments))
+    return '^' + ''.join(re.escape(s) if isinstance(s, str) else _typed_gap(s) for s in segments) + '$'
+
+_WORDS = re.compile(r'\w+|\W')
+_RUNS = re.compile(r'\d+|[^\W\d]+')
+_DIGIT = re.compile(r'\d')
+_LETTER = re.compile('[a-fA-F]')
+
+def _token_segments(values:List[str]) -> Optional[List[Segment]]:
+    # Differing words are split further to digit and other runs when all have the same runs
+    words = [_WORDS.findall(value) for value in values]
+    if len({len(w) for w in words}) != 1:
+        return None
+    segments:List[Segment] = []
+    for column in zip(*words):
+        if all(word == column[0] for word in column):
+            segments.append(column[0])
+            continue
+        if not all(_CLASS_CONTENTS[r'\w'].fullmatch(word) for word in column):
+            return None
+        runs = [_RUNS.findall(word) for word in column]
+        kinds = {tuple(bool(_DIGIT.match(run)) for run in word_runs) for word_runs in runs}
+        if len(kinds) != 1 or _gap_class(list(column)).startswith('['):
+            segments.append(list(column))
+            continue
+        for run_column in zip(*runs):
+            same = all(run == run_column[0] for run in run_column)
+            segments.append(run_column[0] if same else list(run_column))
+    return _merged(segments)
+
+def _merged(segments:List[Segment]) -> List[Segment]:
+    merged:List[Segment] = []
+    for segment in segments:
+        if segment == '':
+            continue
+        if merged and isinstance(segment, str) and isinstance(merged[-1], str):
+            merged[-1] = cast(str, merged[-1]) + segment
+        elif merged and isinstance(segment, list) and isinstance(merged[-1], list):
+            merged[-1] = [before + after for before, after in zip(cast(List[str], merged[-1]), segment)]
+        else:
+            merged.append(segment)
+    return merged
+
+def _gap_class(fillers:List[str], within:str=r'\d', hex_like:bool=False) -> str:
+    hex_like = hex_like or any(len(f) >= _HEX_MIN_LENGTH for f in fillers) or (
+        len({len(f) for f in fillers}) == 1 and any(_DIGIT.search(f) and _LETTER.search(f) for f in fillers))
+    return next(cls for cls in _GAP_CLASSES
+                if within in _SUBCLASSES[cls]
+                and (hex_like or not cls.startswith('['))
+                and all(_CLASS_CONTENTS[cls].fullmatch(f) for f in fillers))
+
+def _typed_gap(fillers:List[str], previous:Optional[str]=None) -> str:
+    lengths:List[Optional[int]] = [len(f) for f in fillers]
+    cls = _gap_class(fillers)
+    if previous is not None:
+        previous_class, low, high, _ = cast(Tuple[str, int, Optional[int], int], _gap_at(previous, 0, len(previous)))
+        cls = _gap_class(fillers, previous_class)
+        lengths += [low, high]
+    if cls == '.':
+        return '.*'
+    low = min(length for length in lengths if length is not None)
+    if None not in lengths and low == max(cast(List[int], lengths)) and low:
+        return cls if low == 1 else f'{cls}{{{low}}}'
+    return cls + ('+' if low else '*')
+
+def _join_tokens(segments:List[Segment]) -> List[Segment]:
+    # A literal between two gaps joins them when it is of the same class as what they contain
+    joined:List[Segment] = []
+    for segment in segments:
+        joined.append(segment)
+        while len(joined) >= 3 and isinstance(joined[-1], list) and isinstance(joined[-2], str) and isinstance(joined[-3], list):
+            right, literal, left = cast(List[str], joined[-1]), cast(str, joined[-2]), cast(List[str], joined[-3])
+            cls = _gap_class(left + right, hex_like=True)
+            if cls == '.' or not _CLASS_CONTENTS[cls].fullmatch(literal):
+                break
+            joined[-3:] = [[before + literal + after for before, after in zip(left, right)]]
+    return joined
+
+def _extend_tokens(segments:List[Segment]) -> List[Segment]:
+    # Characters of a gap's class at the ends of the literals next to it are moved to the gap
+    for index, segment in enumerate(segments):
+        if isinstance(segment, str):
+            continue
+        cls = _gap_class(segment)
+        if cls == '.':
+            continue
+        contents = _CLASS_CONTENTS[cls]
+        if index > 0 and isinstance(segments[index - 1], str):
+            literal = cast(str, segments[index - 1])
+            start = len(literal)
+            while start and contents.fullmatch(literal[start - 1]):
+                start -= 1
+            segments[index - 1] = literal[:start]
+            segment[:] = [literal[start:] + filler for filler in segment]
+        if index + 1 < len(segments) and isinstance(segments[index + 1], str):
+            literal = cast(str, segments[index + 1])
+            end = 0
+            while end < len(literal) and contents.fullmatch(literal[end]):
+                end += 1
+            segments[index + 1] = literal[end:]
+            segment[:] = [filler + literal[:end] for filler in segment]
+    return _merged(segments)
+
+class GapPattern:
+    '''Literal parts with .* gaps in between, as created by regexpify.
+    Matches exactly like the regex but in time linear to the value length.
+
+    As . does not match a newline, every newline in a value has to be matched by
+    a newline in a literal part. The value and the parts are thus matched line by
+    line and within a line each part is searched with str.find after the previous.
+    '''
+
+    def __init__(self, parts:List[str]) -> None:
+        self.pattern = regexpify(parts).pattern
+        self._lines:List[List[str]] = [['']]
+        for part in parts:
+            if part == '':
+                self._lines[-1].append('')
+                continue
+            first, *rest = part.split('\n')
+            self._lines[-1][-1] += first
+            self._lines.extend([line] for line in rest)
+
+    def match(self, value:str) -> bool:
+        start = 0
+        for line in self._lines[:-1]:
+            newline = value.find('\n', start)
+            if newline < 0 or not self._match_line(value, start, newline, line):
+                return False
+            start = newline + 1
+        end = len(value)
+        newline = value.find('\n', start)
+        if newline >= 0:
+            if newline != end - 1:
+                return False
+            end = newline
+        return self._match_line(value, start, end, self._lines[-1])
+
+    @staticmethod
+    def _match_line(value:str, start:int, end:int, segments:List[str]) -> bool:
+        first, last = segments[0], segments[-1]
+        if len(segments) == 1:
+            return end - start == len(first) and value.startswith(first, start, end)
+        if not value.startswith(first, start, end):
+            return False
+        position = start + len(first)
+        for segment in segments[1:-1]:
+            found = value.find(segment, position, end)
+            if found < 0:
+                return False
+            position = found + len(segment)
+        return end - len(last) >= position and value.startswith(last, end - len(last), end)
+
+def compile_pattern(pattern:str) -> Union[GapPattern, Pattern[str]]:
+    '''GapPattern for patterns created by regexpify and compiled regex for anything else.'''
+    parts = parse_regexpified(pattern)
+    if parts is None:
+        return re.compile(pattern)
+    return GapPattern(parts)
 
 if __name__ == '__main__':
     X = '''<!doctype html><html itemscope=\"\" itemtype=\"http://schema.org/WebPage\" lang=\"fi\"><head><meta content=\"text/html; charset=UTF-8\" http-equiv=\"Content-Type\"><meta content=\"/images/branding/googleg/1x/googleg_standard_color_128dp.png\" itemprop=\"image\"><title>Google</title><script nonce=\"hHbCzs7P/CvO3aWi12ShXw==\">(function(){window.google={kEI:'F8YPXpgIoqGbBYiGmpgF',kEXPI:'0,1353747,5662,730,224,755,3972,378,206,2955,249,10,168,121,424,338,175,364,671,483,3,278,4,60,315,175,251,209,10,410444,719024,143,1197791,358,38,329080,1294,12383,4855,32691,15248,861,19404,9286,363,3320,5505,8384,4858,1362,4325,4965,774,2255,2816,1923,3118,4524,1672,1719,1808,1976,10953,5297,2054,622,298,873,1217,9405,11306,2884,20,317,4148,1,368,2778,520,399,992,1285,8,3609,154,612,14,1279,2212,202,328,149,1103,842,515,1474,48,158,662,3438,260,52,1137,2,2063,606,1839,184,595,1138,43,521,1947,747,219,210,44,1009,93,328,1284,16,84,417,2426,23,2223,474,1339,748,209,830,3094,135,771,1216,332,524,7,728,592,1574,1879,1515,1345,4,6509,2832,258,214,367,1040,1042,2459,219,2465,4,842,3093,1274,108,976,270,4,22,486,2,513,654,480,809,99,2,433,930,548,118,643,517,366,732,4,17,1121,258,265,359,1035,2,119,10,335,93,505,78,457,25,206,1787,51,357,63,1029,94,35,967,656,46,66,1,109,10,2,17,38,107,138,442,373,959,426,61,10,26,230,781,189,6,15,169,107,32,536,265,87,116,72,174,700,760,22,81,194,112,1178,157,5859137,1874,1804020,4194851,2799848,1323,549,333,444,1,2,80,1,900,896,1,8,1,2,2551,1,748,141,795,10,553,1,4265,1,1,1,1,137,1,802,77,9,169,3,2,2,2,9,4,2,2,4,222,23964287',authuser:0,kscs:'c9c918f0_F8YPXpgIoqGbBYiGmpgF',kGL:'FI',kBL:'v77x'};google.sn='webhp';google.kHL='fi';google.jsfs='Ffpdje';})();(function(){google.lc=[];google.li=0;google.getEI=function(a){for(var b;a&&(!a.getAttribute||!(b=a.getAttribute(\"eid\")));)a=a.parentNode;return b||google.kEI};google.getLEI=function(a){for(var b=null;a&&(!a.getAttribute||!(b=a.getAttribute(\"leid\")));)a=a.parentNode;return b};google.https=function(){return\"https:\"==window.location.protocol};google.ml=function(){return null};google.time=function(){return(new Date).getTime()};google.log=function(a,b,e,c,g){if(a=google.logUrl(a,b,e,c,g)){b=new Image;var d=google.lc,f=google.li;d[f]=b;b.onerror=b.onload=b.onabort=function(){delete d[f]};google.vel&&google.vel.lu&&google.vel.lu(a);b.src=a;google.li=f+1}};google.logUrl=function(a,b,e,c,g){var d=\"\",f=google.ls||\"\";e||-1!=b.search(\"&ei=\")||(d=\"&ei=\"+google.getEI(c),-1==b.search(\"&lei=\")&&(c=google.getLEI(c))&&(d+=\"&lei=\"+c));c=\"\";!e&&google.cshid&&-1==b.search(\"&cshid=\")&&\"slh\"!=a&&(c=\"&cshid=\"+google.cshid);a=e||\"/\"+(g||\"gen_204\")+\"?atyp=i&ct=\"+a+\"&cad=\"+b+d+f+\"&zx=\"+google.time()+c;/^http:/i.test(a)&&google.https()&&(google.ml(Error(\"a\"),!1,{src:a,glmm:1}),a=\"\");return a};}).call(this);(function(){google.y={};google.x=function(a,b){if(a)var c=a.id;else{do c=Math.random();while(google.y[c])}google.y[c]=[a,b];return!1};google.lm=[];google.plm=function(a){google.lm.push.apply(google.lm,a)};google.lq=[];google.load=function(a,b,c){google.lq.push([[a],b,c])};google.loadAll=function(a,b){google.lq.push([a,b])};}).call(this);google.f={};(function(){document.documentElement.addEventListener(\"submit\",function(b){var a;if(a=b.target){var c=a.getAttribute(\"data-submitfalse\");a=\"1\"==c||\"q\"==c&&!a.elements.q.value?!0:!1}else a=!1;a&&(b.preventDefault(),b.stopPropagation())},!0);}).call(this);var a=window.location,b=a.href.indexOf(\"#\");if(0<=b){var c=a.href.substring(b+1);/(^|&)q=/.test(c)&&-1==c.indexOf(\"#\")&&a.replace(\"/search?\"+c.replace(/(^|&)fp=[^&]*/g,\"\")+\"&cad=h\")};</script><style>#gbar,#guser{font-size:13px;padding-top:1px !important;}#gbar{height:22px}#guser{padding-bottom:7px !important;text-align:right}.gbh,.gbd{border-top:1px solid #c9d7f1;font-size:1px}.gbh{height:0;position:absolute;top:24px;width:100%}@media all{.gb1{height:22px;margin-right:.5em;vertical-align:top}#gbar{float:left}}a.gb1,a.gb4{text-decoration:underline !important}a.gb1,a.gb4{color:#00c !important}.gbi .gb4{color:#dd8e27 !important}.gbf .gb4{color:#900 !important}\n</style><style>body,td,a,p,.h{font-family:arial,sans-serif}body{margin:0;overflow-y:scroll}#gog{padding:3px 8px 0}td{line-height:.8em}.gac_m td{line-height:17px}form{margin-bottom:20px}.h{color:#36c}.q{color:#00c}.ts td{padding:0}.ts{border-collapse:collapse}em{font-weight:bold;font-style:normal}.lst{height:25px;width:496px}.gsfi,.lst{font:18px arial,sans-serif}.gsfs{font:17px arial,sans-serif}.ds{display:inline-box;display:inline-block;margin:3px 0 4px;margin-left:4px}input{font-family:inherit}a.gb1,a.gb2,a.gb3,a.gb4{color:#11c !important}body{background:#fff;color:black}a{color:#11c;text-decoration:none}a:hover,a:active{text-decoration:underline}.fl a{color:#36c}a:visited{color:#551a8b}a.gb1,a.gb4{text-decoration:underline}a.gb3:hover{text-decoration:none}#ghead a.gb2:hover{color:#fff !important}.sblc{padding-top:5px}.sblc a{display:block;margin:2px 0;margin-left:13px;font-size:11px}.lsbb{background:#eee;border:solid 1px;border-color:#ccc #999 #999 #ccc;height:30px}.lsbb{display:block}.ftl,#fll a{display:inline-block;margin:0 12px}.lsb{background:url(/images/nav_logo229.png) 0 -261px repeat-x;border:none;color:#000;cursor:pointer;height:30px;margin:0;outline:0;font:15px arial,sans-serif;vertical-align:top}.lsb:active{background:#ccc}.lst:focus{outline:none}.tiah{width:458px}</style><script nonce=\"hHbCzs7P/CvO3aWi12ShXw==\"></script></head><body bgcolor=\"#fff\"><script nonce=\"hHbCzs7P/CvO3aWi12ShXw==\">(function(){var src='/images/nav_logo229.png';var iesg=false;document.body.onload = function(){window.n && window.n();if (document.images){new Image().src=src;}\nif (!iesg){document.f&&document.f.q.focus();document.gbqf&&document.gbqf.q.focus();}\n}\n})();</script><div id=\"mngb\"> <div id=gbar><nobr><b class=gb1>Haku</b> <a class=gb1 href=\"http://www.google.fi/imghp?hl=fi&tab=wi\">Kuvahaku</a> <a class=gb1 href=\"http://maps.google.fi/maps?hl=fi&tab=wl\">Maps</a> <a class=gb1 href=\"https://play.google.com/?hl=fi&tab=w8\">Play</a> <a class=gb1 href=\"http://www.youtube.com/?gl=FI&tab=w1\">YouTube</a> <a class=gb1 href=\"https://mail.google.com/mail/?tab=wm\">Gmail</a> <a class=gb1 href=\"https://drive.google.com/?tab=wo\">Drive</a> <a class=gb1 href=\"https://www.google.com/calendar?tab=wc\">Kalenteri</a> <a class=gb1 style=\"text-decoration:none\" href=\"https://www.google.fi/intl/fi/about/products?tab=wh\"><u>Lis\u00e4\u00e4</u> &raquo;</a></nobr></div><div id=guser width=100%><nobr><span id=gbn class=gbi></span><span id=gbf class=gbf></span><span id=gbe></span><a href=\"http://www.google.fi/history/optout?hl=fi\" class=gb4>Verkkohistoria</a> | <a  href=\"/preferences?hl=fi\" class=gb4>Asetukset</a> | <a target=_top id=gb_70 href=\"https://accounts.google.com/ServiceLogin?hl=fi&passive=true&continue=http://www.google.com/\" class=gb4>Kirjaudu sis\u00e4\u00e4n</a></nobr></div><div class=gbh style=left:0></div><div class=gbh style=right:0></div> </div><center><br clear=\"all\" id=\"lgpd\"><div id=\"lga\"><img alt=\"Google\" height=\"92\" src=\"/images/branding/googlelogo/1x/googlelogo_white_background_color_272x92dp.png\" style=\"padding:28px 0 14px\" width=\"272\" id=\"hplogo\"><br><br></div><form action=\"/search\" name=\"f\"><table cellpadding=\"0\" cellspacing=\"0\"><tr valign=\"top\"><td width=\"25%\">&nbsp;</td><td align=\"center\" nowrap=\"\"><input name=\"ie\" value=\"ISO-8859-1\" type=\"hidden\"><input value=\"fi\" name=\"hl\" type=\"hidden\"><input name=\"source\" type=\"hidden\" value=\"hp\"><input name=\"biw\" type=\"hidden\"><input name=\"bih\" type=\"hidden\"><div class=\"ds\" style=\"height:32px;margin:4px 0\"><div style=\"position:relative;zoom:1\"><input class=\"lst tiah\" style=\"color:#000;margin:0;padding:5px 8px 0 6px;vertical-align:top;padding-right:38px\" autocomplete=\"off\" value=\"\" title=\"Google-haku\" maxlength=\"2048\" name=\"q\" size=\"57\"><img src=\"/textinputassistant/tia.png\" style=\"position:absolute;cursor:pointer;right:5px;top:4px;z-index:300\" data-script-url=\"/textinputassistant/11/fi_tia.js\" id=\"tsuid1\" alt=\"\" height=\"23\" width=\"27\"><script nonce=\"hHbCzs7P/CvO3aWi12ShXw==\">(function(){var id='tsuid1';document.getElementById(id).onclick = function(){var s = document.createElement('script');s.src = this.getAttribute('data-script-url');(document.getElementById('xjsc')||document.body).appendChild(s);};})();</script></div></div><br style=\"line-height:0\"><span class=\"ds\"><span class=\"lsbb\"><input class=\"lsb\" value=\"Google-haku\" name=\"btnG\" type=\"submit\"></span></span><span class=\"ds\"><span class=\"lsbb\"><input class=\"lsb\" id=\"tsuid2\" value=\"Kokeilen onneani\" name=\"btnI\" type=\"submit\"><script nonce=\"hHbCzs7P/CvO3aWi12ShXw==\">(function(){var id='tsuid2';document.getElementById(id).onclick = function(){if (this.form.q.value){this.checked = 1;if (this.form.iflsig)this.form.iflsig.disabled = false;}\nelse top.location='/doodles/';};})();</script><input value=\"AAP1E1EAAAAAXg_UJ4SI6d3tIoruD1RZmNNqI_VTjYxd\" name=\"iflsig\" type=\"hidden\"></span></span></td><td class=\"fl sblc\" align=\"left\" nowrap=\"\" width=\"25%\"><a href=\"/advanced_search?hl=fi&amp;authuser=0\">Tarkennettu haku</a><a href=\"/language_tools?hl=fi&amp;authuser=0\">Kielity\u00f6kalut</a></td></tr></table><input id=\"gbv\" name=\"gbv\" type=\"hidden\" value=\"1\"><script nonce=\"hHbCzs7P/CvO3aWi12ShXw==\">(function(){var a,b=\"1\";if(document&&document.getElementById)if(\"undefined\"!=typeof XMLHttpRequest)b=\"2\";else if(\"undefined\"!=typeof ActiveXObject){var c,d,e=[\"MSXML2.XMLHTTP.6.0\",\"MSXML2.XMLHTTP.3.0\",\"MSXML2.XMLHTTP\",\"Microsoft.XMLHTTP\"];for(c=0;d=e[c++];)try{new ActiveXObject(d),b=\"2\"}catch(h){}}a=b;if(\"2\"==a&&-1==location.search.indexOf(\"&gbv=2\")){var f=google.gbvu,g=document.getElementById(\"gbv\");g&&(g.value=a);f&&window.setTimeout(function(){location.href=f},0)};}).call(this);</script></form><div id=\"gac_scont\"></div><div style=\"font-size:83%;min-height:3.5em\"><br><div id=\"gws-output-pages-elements-homepage_additional_languages__als\"><style>#gws-output-pages-elements-homepage_additional_languages__als{font-size:small;margin-bottom:24px}#SIvCob{display:inline-block;line-height:28px;}#SIvCob a{padding:0 3px;}.H6sW5{display:inline-block;margin:0 2px;white-space:nowrap}.z4hgWe{display:inline-block;margin:0 2px}</style><div id=\"SIvCob\">Googlen versiot:  <a href=\"http://www.google.com/setprefs?sig=0_c0VjhULyvVcnPjyQN5lkh_wUQlQ%3D&amp;hl=sv&amp;source=homepage&amp;sa=X&amp;ved=0ahUKEwjY7_GCw-jmAhWi0KYKHQiDBlMQ2ZgBCAU\">svenska</a>  </div></div></div><span id=\"footer\"><div style=\"font-size:10pt\"><div style=\"margin:19px auto;text-align:center\" id=\"fll\"><a href=\"/intl/fi/ads/\">Googlen mainontaratkaisut</a><a href=\"http://www.google.fi/intl/fi/services/\">Yritysratkaisut</a><a href=\"/intl/fi/about.html\">Tietoja Googlesta</a><a href=\"http://www.google.com/setprefdomain?prefdom=FI&amp;prev=http://www.google.fi/&amp;sig=K_Y42aBv_dWMSncnrKW2i-TOFu1DY%3D\">Google.fi</a></div></div><p style=\"color:#767676;font-size:8pt\">&copy; 2020 - <a href=\"/intl/fi/policies/privacy/\">Tietosuoja</a> - <a href=\"/intl/fi/policies/terms/\">K\u00e4ytt\u00f6ehdot</a></p></span></center><script nonce=\"hHbCzs7P/CvO3aWi12ShXw==\">(function(){window.google.cdo={height:0,width:0};(function(){var a=window.innerWidth,b=window.innerHeight;if(!a||!b){var c=window.document,d=\"CSS1Compat\"==c.compatMode?c.documentElement:c.body;a=d.clientWidth;b=d.clientHeight}a&&b&&(a!=google.cdo.width||b!=google.cdo.height)&&google.log(\"\",\"\",\"/client_204?&atyp=i&biw=\"+a+\"&bih=\"+b+\"&ei=\"+google.kEI);}).call(this);})();(function(){var u='/xjs/_/js/k\\x3dxjs.hp.en.3mkxARIkkN0.O/m\\x3dsb_he,d/am\\x3dAAMCbAQ/d\\x3d1/rs\\x3dACT90oH0ZgFCL-q_Qh6y8ytgGBhQJ9zvUw';\nsetTimeout(function(){var b=document;var a=\"SCRIPT\";\"application/xhtml+xml\"===b.contentType&&(a=a.toLowerCase());a=b.createElement(a);a.src=u;google.timers&&google.timers.load&&google.tick&&google.tick(\"load\",\"xjsls\");document.body.appendChild(a)},0);})();(function(){window.google.xjsu='/xjs/_/js/k\\x3dxjs.hp.en.3mkxARIkkN0.O/m\\x3dsb_he,d/am\\x3dAAMCbAQ/d\\x3d1/rs\\x3dACT90oH0ZgFCL-q_Qh6y8ytgGBhQJ9zvUw';})();function _DumpException(e){throw e;}\nfunction _F_installCss(c){}\n(function(){google.spjs=false;google.snet=true;google.em=[];google.emw=false;})();(function(){var pmc='{\\x22d\\x22:{},\\x22sb_he\\x22:{\\x22agen\\x22:true,\\x22cgen\\x22:true,\\x22client\\x22:\\x22heirloom-hp\\x22,\\x22dh\\x22:true,\\x22dhqt\\x22:true,\\x22ds\\x22:\\x22\\x22,\\x22ffql\\x22:\\x22en\\x22,\\x22fl\\x22:true,\\x22host\\x22:\\x22google.com\\x22,\\x22isbh\\x22:28,\\x22jsonp\\x22:true,\\x22msgs\\x22:{\\x22cibl\\x22:\\x22Tyhjenn\u00e4 haku\\x22,\\x22dym\\x22:\\x22Tarkoititko:\\x22,\\x22lcky\\x22:\\x22Kokeilen onneani\\x22,\\x22lml\\x22:\\x22Lis\u00e4tietoja\\x22,\\x22oskt\\x22:\\x22Sy\u00f6tt\u00f6ty\u00f6kalut\\x22,\\x22psrc\\x22:\\x22T\u00e4m\u00e4 haku on poistettu \\\\u003Ca href\\x3d\\\\\\x22/history\\\\\\x22\\\\u003EVerkkohistoriastasi\\\\u003C/a\\\\u003E\\x22,\\x22psrl\\x22:\\x22Poista\\x22,\\x22sbit\\x22:\\x22Hae kuvan perusteella\\x22,\\x22srch\\x22:\\x22Google-haku\\x22},\\x22ovr\\x22:{},\\x22pq\\x22:\\x22\\x22,\\x22refpd\\x22:true,\\x22rfs\\x22:[],\\x22sbpl\\x22:24,\\x22sbpr\\x22:24,\\x22scd\\x22:10,\\x22sce\\x22:5,\\x22stok\\x22:\\x22Bi6XYXM0mi1VKOrGZ257sXeY0HM\\x22,\\x22uhde\\x22:false}}';google.pmc=JSON.parse(pmc);})();</script>        </body></html>'''
@@ -29,7 +515,7 @@ if __name__ == '__main__':
     print(['moi'] == find_matching_parts("moi", "moi"))
     print([''] == (find_matching_parts("xyz", "abc")))
     print(['x', '', 'i'] == find_matching_parts("xcci", "xbbi"))
-    matcher = regexpify(find_matching_parts(X, Y))
+    matcher = compile_pattern(regexpify(find_matching_parts(X, Y)).pattern)
     print(matcher.match(X))
     print(matcher.match(Y))
     print(matcher.match("MOO"))
@@ -47,3 +533,8 @@ if __name__ == '__main__':
     print(combine(['', 'a', '', 'a'], 'axyz'))
     print(combine([''], 'a') == [''])
     print(combine(['', 'a'], 'a') == ['', 'a'])
+    print(combine(['a', '', 'b'], 'ab') == ['a', '', 'b'])
+    print(combine(['x', '', 'y'], 'xöy') == ['x', '', 'y'])
+    print(parse_regexpified(regexpify(['', 'a.b', '', 'c\\n']).pattern) == ['', 'a.b', '', 'c\\n'])
+    print(parse_regexpified('^\\d.*$') is None)
+    print(isinstance(matcher, GapPattern))
@@ -0,0 +1,108 @@
+'''Constant size summary of trained numbers and the tolerance bands expected from it.'''
+from typing import Dict, Iterable, List, Optional, Tuple, cast
+import bisect
+import math
+import re
+
+SKETCH_SIZE = 32
+_BAND = re.compile(r'^(?:(\d+(?:\.\d+)?)sigma|p(\d+(?:\.\d+)?)-p(\d+(?:\.\d+)?))$')
+
+def parse_band(spec:str) -> Tuple[str, float, float]:
+    '''('sigma', k, k) for mean ± k·σ or ('quantile', low, high) for p<low>-p<high>.'''
+    match = _BAND.match(spec.strip().lower())
+    if not match:
+        raise ValueError(f"Unknown tolerance band '{spec}'. Use <k>sigma or p<low>-p<high>, for example 3sigma or p1-p99")
+    if match.group(1):
+        return 'sigma', float(match.group(1)), float(match.group(1))
+    low, high = float(match.group(2)), float(match.group(3))
+    if not 0 <= low < high <= 100:
+        raise ValueError(f"Tolerance band '{spec}' needs percentiles 0 <= low < high <= 100")
+    return 'quantile', low / 100, high / 100
+
+
+class NumberSummary:
+    '''Count, min, max, mean and variance with Welford's method and a sketch of at most
+    SKETCH_SIZE weighted centroids for quantiles. Adding a number takes constant time and space.
+    Centroids are merged less near the ends so that tail quantiles stay accurate.'''
+
+    def __init__(self, count:int=0, mean:float=0.0, m2:float=0.0, low:float=math.inf, high:float=-math.inf,
+                 sketch:Optional[List[List[float]]]=None) -> None:
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = low
+        self.max = high
+        self.sketch:List[List[float]] = sketch or []
+
+    @classmethod
+    def of(cls, values:Iterable[float]) -> 'NumberSummary':
+        summary = cls()
+        for value in values:
+            summary.add(value)
+        return summary
+
+    @classmethod
+    def from_json(cls, data:Dict[str, object]) -> 'NumberSummary':
+        return cls(cast(int, data['count']), cast(float, data['mean']), cast(float, data['m2']),
+                   cast(float, data['min']), cast(float, data['max']), [list(c) for c in cast(List[List[float]], data['sketch'])])
+
+    def to_json(self) -> Dict[str, object]:
+        return {'count':self.count, 'mean':self.mean, 'm2':self.m2, 'min':self.min, 'max':self.max, 'sketch':self.sketch}
+
+    def add(self, value:float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        index = bisect.bisect_left(self.sketch, [value])
+        if index < len(self.sketch) and self.sketch[index][0] == value:
+            self.sketch[index][1] += 1
+            return
+        self.sketch.insert(index, [value, 1])
+        if len(self.sketch) > SKETCH_SIZE:
+            self._merge_cheapest()
+
+    def _merge_cheapest(self) -> None:
+        # Merge the neighbours with the smallest weight relative to what their quantile allows
+        best, best_cost, cumulative = 0, math.inf, 0.0
+        for i in range(len(self.sketch) - 1):
+            weight = self.sketch[i][1] + self.sketch[i + 1][1]
+            q = (cumulative + weight / 2) / self.count
+            cost = weight / max(1.0, 4 * self.count * q * (1 - q) / SKETCH_SIZE)
+            if cost < best_cost:
+                best, best_cost = i, cost
+            cumulative += self.sketch[i][1]
+        (left, left_weight), (right, right_weight) = self.sketch[best], self.sketch[best + 1]
+        weight = left_weight + right_weight
+        self.sketch[best:best + 2] = [[left + (right - left) * right_weight / weight, weight]]
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def quantile(self, q:float) -> float:
+        '''Interpolated between centroid centers, and min and max at the ends.'''
+        if not self.count:
+            raise ValueError("Quantile of an empty summary")
+        target = q * self.count
+        previous_center, previous = 0.0, self.min
+        cumulative = 0.0
+        for mean, weight in self.sketch:
+            center = cumulative + weight / 2
+            if target <= center:
+                if center == previous_center:
+                    return mean
+                return previous + (mean - previous) * (target - previous_center) / (center - previous_center)
+            previous_center, previous = center, mean
+            cumulative += weight
+        if self.count == previous_center:
+            return self.max
+        return previous + (self.max - previous) * (target - previous_center) / (self.count - previous_center)
+
+    def band(self, spec:str) -> Tuple[float, float]:
+        kind, low, high = parse_band(spec)
+        if kind == 'sigma':
+            return self.mean - low * self.stdev, self.mean + high * self.stdev
+        return self.quantile(low), self.quantile(high)
@@ -0,0 +1,53 @@
+'''Time and value bytes spent per expectation in validation, resolution and inspection.'''
+from typing import Dict, Iterable, List, Tuple, cast
+import sys
+import time
+from .digests import ValueDigest
+
+PHASES = ('validate', 'resolve', 'inspect')
+Key = Tuple[str, str, str]
+
+def value_size(value:object) -> int:
+    '''Length of strings and bytes, size of digested values and shallow size of other values.'''
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, ValueDigest):
+        return value.size or 0
+    return sys.getsizeof(value)
+
+
+class Timings:
+
+    def __init__(self) -> None:
+        # count, seconds and bytes per phase of each expectation
+        self._stats:Dict[Key, Dict[str, List[float]]] = {}
+
+    def add(self, key:Key, phase:str, start:float, value:object, batch:bool=False) -> None:
+        '''Add time from start, a time.perf_counter() value, until now. With batch the value
+        is a sequence of the values of one call.'''
+        seconds = time.perf_counter() - start
+        stats = self._stats.setdefault(key, {}).setdefault(phase, [0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] += sum(value_size(item) for item in cast(Iterable[object], value)) if batch else value_size(value)
+
+    def report(self) -> List[Dict[str, object]]:
+        '''Expectations with their costs, the most expensive first.'''
+        rows:List[Dict[str, object]] = []
+        for (section, name, expectation_id), phases in self._stats.items():
+            row:Dict[str, object] = {'section':section, 'name':name, 'id':expectation_id,
+                                     'seconds':sum(stats[1] for stats in phases.values())}
+            for phase, (count, seconds, size) in phases.items():
+                row[phase] = {'count':int(count), 'seconds':seconds, 'bytes':int(size)}
+            rows.append(row)
+        rows.sort(key=lambda row: row['seconds'], reverse=True)  # type: ignore
+        return rows
+
+    def table(self, top:int) -> str:
+        lines = [f"{'seconds':>10} {'calls':>7} {'bytes':>12}  expectation"]
+        for row in self.report()[:top]:
+            phases = [row[phase] for phase in PHASES if phase in row]
+            calls = sum(phase['count'] for phase in phases)  # type: ignore
+            size = sum(phase['bytes'] for phase in phases)  # type: ignore
+            lines.append(f"{row['seconds']:>10.6f} {calls:>7} {size:>12}  {row['section']} / {row['name']} / {row['id']}")
+        return "\n".join(lines)
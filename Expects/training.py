@@ -0,0 +1,387 @@
+'''Resolvers that loosen expectations to match trained values, imported when training first needs them.'''
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, cast
+from numbers import Number
+from . import ExampleRetention, Matcher, _QUIET_VALIDATOR, _summarizes, paths, substrings
+from .digests import ValueDigest
+from .fields import MISSING, field_value, is_jsonable, jsonable_fields
+from .paths import PathTree
+from .summary import NumberSummary
+from robot.api import logger # type: ignore
+
+
+class ExpectationResolver:
+
+    def __init__(self, value:object, expected:Dict[str, object], examples:Optional[ExampleRetention]=None, tolerance:str='') -> None:
+        self._value = value
+        self._expected = expected
+        self._examples = examples or ExampleRetention()
+        self._tolerance = tolerance
+        self._has_old_value = 'value' in self._expected
+        self._old_expected_value = self._expected.get('value')
+
+    def resolve(self):
+        if isinstance(self._value, ValueDigest):
+            return self._resolve_digest()
+        if _summarizes(self._expected, self._value):
+            return self._resolve_summary([cast(float, self._value)])
+        jsonable = is_jsonable(self._value)
+        anyof = self._expected.get('anyof', [])
+        if self._has_old_value and self._old_expected_value == self._value:
+            return
+        if isinstance(self._value, str) and ('value' in self._expected or 'anyof' in self._expected) and self._resolve_with_tokens():
+            return
+        if jsonable and ('paths' in self._expected or (self._has_old_value and
+            any(isinstance(self._old_expected_value, t) and isinstance(self._value, t) for t in (dict, list)))):
+            return self._resolve_paths()
+        if ('value' in self._expected or
+            ('anyof' in self._expected and (len(anyof) < 5 or
+            any(type(item) != type(self._value) for item in anyof)))) and jsonable:
+            return self._resolve_with_anyof()
+        if isinstance(self._value, str):
+            return self._resolve_str()
+        if isinstance(self._value, Number):
+            return self._resolve_number()
+        if jsonable and not self._has_old_value:
+            self._expected['value'] = self._value
+            return
+        if not jsonable and ('fields' in self._expected or self._has_old_value):
+            return self._resolve_complex_object()
+        fields = None if jsonable else {field:{'value':val} for field, val in jsonable_fields(self._value)}
+        if fields:
+            self._expected['fields'] = fields
+            logger.console("Resolved by expecting all fields")
+            return
+        raise AssertionError(f"No strategy for type {type(self._value)}")
+
+    def _resolve_with_anyof(self):
+        if 'value' in self._expected:
+            del self._expected['value']
+            self._expected['anyof'] = [self._old_expected_value]
+        if self._value not in self._expected['anyof']:
+            self._expected['anyof'].append(self._value)
+        logger.console(f"Resolved with anyof")
+
+    def _resolve_with_tokens(self) -> bool:
+        # Values that differ only by numbers, hex or long tokens get a regex at once instead of anyof
+        values = [self._old_expected_value] if self._has_old_value else list(cast(List[object], self._expected['anyof']))
+        values.append(self._value)
+        if not all(isinstance(value, str) for value in values):
+            return False
+        pattern = substrings.generalize(self._combined(cast(List[str], values)), cast(List[str], values))
+        if not substrings.has_only_token_gaps(pattern) or not _meaningful(pattern):
+            return False
+        self._expected.pop('value', None)
+        self._expected.pop('anyof', None)
+        self._expected['regex'] = pattern
+        self._examples.keep(self._expected, values)
+        logger.console(f"Resolved with regex")
+        return True
+
+    def _resolve_str(self):
+        # Values without a meaningful regex in common stay in anyof
+        if self._has_old_value:
+            parts = substrings.find_matching_parts(self._value, self._old_expected_value)
+            pattern = substrings.generalize(parts, [self._old_expected_value, self._value])
+            if not _meaningful(pattern):
+                return self._resolve_with_anyof()
+            del self._expected['value']
+            self._expected['regex'] = pattern
+            self._examples.keep(self._expected, [self._old_expected_value, self._value])
+            logger.console(f"Resolved with regex")
+        elif 'regex' in self._expected:
+            examples = self._expected.get('examples', [])
+            typed = self._examples.keeps_all() and substrings.has_typed_gaps(self._expected['regex'])
+            if not self._resolve_with_regex(examples, typed, []):
+                self._resolve_examples_with_anyof([self._value])
+        elif 'anyof' in self._expected:
+            anyof = self._expected['anyof']
+            if not self._resolve_with_regex(anyof, True, anyof):
+                return self._resolve_with_anyof()
+            del self._expected['anyof']
+        else:
+            self._expected['value'] = self._value
+
+    def _resolve_examples_with_anyof(self, values:List[object]) -> None:
+        # Values the regex can not be widened to meaningfully are expected with the kept examples
+        examples = cast(List[object], self._expected.get('examples', []))
+        if not examples:
+            raise AssertionError("Could not resolve with a meaninful regex")
+        for key in ('regex', 'examples', 'examples_seen'):
+            self._expected.pop(key, None)
+        self._expected['anyof'] = _distinct(examples + values)
+        logger.console(f"Resolved with anyof of the examples")
+
+    def _learned_parts(self, examples:List[str]) -> Tuple[List[str], Optional[List[str]]]:
+        # Regexes created by regexpify or generalize are the learned parts and gaps.
+        # Others are learned again from examples.
+        parsed = substrings.parse_gaps(cast(str, self._expected['regex'])) if 'regex' in self._expected else None
+        if parsed is not None:
+            return parsed
+        if not examples:
+            raise AssertionError("Could not resolve with a meaninful regex")
+        return self._combined(examples), None
+
+    @staticmethod
+    def _combined(values:List[str]) -> List[str]:
+        parts = [values[0]]
+        for value in values[1:]:
+            parts = substrings.combine(parts, value)
+        return parts
+
+    def _resolve_with_regex(self, examples:List[str], typed:bool, kept:List[str]) -> bool:
+        # Gaps are widened while the parts stay the same. New parts get gaps typed by all known values.
+        value = cast(str, self._value)
+        parts, gaps = self._learned_parts(examples)
+        combined = substrings.combine(parts, value)
+        if combined == parts and gaps is not None:
+            pattern = substrings.generalize(combined, [value], gaps)
+        elif typed:
+            pattern = substrings.generalize(combined, examples + [value])
+        else:
+            pattern = substrings.regexpify(combined).pattern
+        if not _meaningful(pattern):
+            return False
+        self._expected['regex'] = pattern
+        self._examples.keep(self._expected, cast(List[object], kept + [value]))
+        logger.console(f"Resolved with regex")
+        return True
+
+    def _resolve_paths(self) -> None:
+        if self._has_old_value:
+            collected, shapes = paths.collect([self._old_expected_value, self._value])
+            if '$' in collected:
+                return self._resolve_with_anyof()
+            del self._expected['value']
+            self._expected['paths'] = {**shapes, **{path:self._resolve_values({'value':values[0]}, values[1:]) for path, values in collected.items()}}
+            logger.console(f"Resolved with {len(collected)} paths")
+            return
+        self._update_paths([self._value], self._resolve_values)
+
+    def _update_paths(self, values:List[object], resolve:Callable[[Dict[str, object], List[object]], Dict[str, object]]) -> None:
+        # Paths are expected only as long as the values are containers of the same type and
+        # some leaf path is left. Otherwise the values are expected as they are.
+        expected_paths = cast(Dict[str, Dict[str, object]], self._expected['paths'])
+        container = paths.root_type(expected_paths)
+        if not all(paths.is_container(value, container) for value in values):
+            logger.console(f"Value is no longer a {container.__name__}")
+            return self._expect_values(values)
+        tree = PathTree(expected_paths)
+        found:Dict[str, List[object]] = {}
+        missing:Set[str] = set()
+        for value in values:
+            for path, exp, val in tree.walk(value):
+                if val is MISSING or (paths.is_shape(exp) and not paths.is_container(val, list)):
+                    missing.add(path)
+                else:
+                    found.setdefault(path, []).append(val)
+        for path in missing:
+            del expected_paths[path]
+            logger.console(f"No longer expecting {path}")
+        for path, vals in found.items():
+            if path in missing:
+                continue
+            if paths.is_shape(expected_paths[path]):
+                if not all(vals):
+                    expected_paths[path].pop('nonempty', None)
+            else:
+                resolve(expected_paths[path], vals)
+        if all(paths.is_shape(exp) for exp in expected_paths.values()):
+            logger.console("No leaf paths left")
+            return self._expect_values(values)
+        logger.console("Resolved by updating path expectations")
+
+    def _expect_values(self, values:List[object]) -> None:
+        del self._expected['paths']
+        self._expected['value'] = values[0]
+        self._resolve_values(self._expected, values[1:])
+
+    def _resolve_values(self, expected:Dict[str, object], values:List[object]) -> Dict[str, object]:
+        # Only values that do not match yet loosen the expectation
+        matcher = Matcher(expected)
+        for value in values:
+            if not _QUIET_VALIDATOR.validate(value, matcher):
+                ExpectationResolver(value, expected, self._examples).resolve()
+                matcher = Matcher(expected)
+        return expected
+
+    def _resolve_digest(self):
+        had_digest = 'sha256' in self._expected
+        for key in ('value', 'anyof', 'fields', 'paths', 'startswith', 'regex', 'min', 'max', 'stats', 'band', 'examples', 'examples_seen'):
+            self._expected.pop(key, None)
+        self._expected['size'] = self._value.size
+        self._expected['sha256'] = self._value.sha256
+        if had_digest:
+            logger.console(f"Resolved with size {self._value.size} and sha256 {self._value.sha256}")
+
+    def _resolve_number(self):
+        assert 'value' not in self._expected or 'min' not in self._expected
+        if self._tolerance and ('value' in self._expected or 'anyof' in self._expected):
+            known = [self._old_expected_value] if self._has_old_value else self._expected['anyof']
+            return self._start_summary(known + [self._value])
+        if self._has_old_value:
+            del self._expected['value']
+            self._expected['min'] = min(self._value, self._old_expected_value)
+            self._expected['max'] = max(self._value, self._old_expected_value)
+            logger.console(f"Resolved with min {self._expected['min']} and max {self._expected['max']}")
+            return
+        if 'anyof' in self._expected:
+            self._expected['min'] = min(self._value, *self._expected['anyof'])
+            self._expected['max'] = max(self._value, *self._expected['anyof'])
+            del self._expected['anyof']
+            logger.console(f"Resolved with min {self._expected['min']} and max {self._expected['max']}")
+            return
+        if 'min' in self._expected and 'max' in self._expected:
+            self._expected['min'] = min(self._value, self._expected['min'])
+            self._expected['max'] = max(self._value, self._expected['max'])
+            assert 'value' not in self._expected
+            logger.console(f"Resolved with min {self._expected['min']} and max {self._expected['max']}")
+            return
+        self._expected['value'] = self._value
+
+    def _start_summary(self, numbers:List[float]) -> None:
+        self._expected.pop('value', None)
+        self._expected.pop('anyof', None)
+        self._expected['stats'] = NumberSummary.of(numbers).to_json()
+        self._expected['band'] = self._tolerance
+        logger.console(f"Resolved with a summary of {len(numbers)} numbers and tolerance band {self._tolerance}")
+
+    def _resolve_summary(self, numbers:List[float]) -> None:
+        stats = NumberSummary.from_json(cast(Dict[str, object], self._expected['stats']))
+        for number in numbers:
+            stats.add(number)
+        self._expected['stats'] = stats.to_json()
+        if 'band' in self._expected:
+            low, high = stats.band(cast(str, self._expected['band']))
+            logger.console(f"Resolved with tolerance band {low} to {high} from {stats.count} numbers")
+
+    def _resolve_complex_object(self):
+        if self._has_old_value:
+            raise AssertionError(f"No startegy for complex object with already expected value")
+        for field, expected in self._expected['fields'].items():
+            val = field_value(self._value, field)
+            if val is not MISSING and is_jsonable(val):
+                ExpectationResolver(val, expected, self._examples).resolve()
+        logger.console("Resolved by updating field expectations")
+
+
+def _meaningful(pattern:str) -> bool:
+    # Patterns without a literal part to anchor them, like ^.*$ or ^\w+$, are not
+    parsed = substrings.parse_gaps(pattern)
+    return parsed is None or any(parsed[0])
+
+
+def _distinct(values:Iterable[object]) -> List[object]:
+    distinct:List[object] = []
+    seen:Set[object] = set()
+    for value in values:
+        if isinstance(value, (str, int, float)):
+            key:object = (type(value), value)
+        else:
+            key = repr(value) if is_jsonable(value) else id(value)
+        if key not in seen:
+            seen.add(key)
+            distinct.append(value)
+    return distinct
+
+
+class BatchResolver(ExpectationResolver):
+    '''Resolves an expectation from many values at once. Numbers get min and max and strings
+    a regex of the parts common to all values in one pass instead of value by value.'''
+
+    _STR_KEYS = {'value', 'anyof', 'regex'}
+    _NUMBER_KEYS = {'value', 'anyof', 'min', 'max'}
+    _IGNORED_KEYS = {'id', 'expectId', 'examples', 'examples_seen'}
+
+    def __init__(self, values:List[object], expected:Dict[str, object], examples:Optional[ExampleRetention]=None, tolerance:str='') -> None:
+        ExpectationResolver.__init__(self, values[-1], expected, examples, tolerance)
+        self._values = values
+
+    def resolve(self) -> bool:
+        '''Returns whether the expectation changed.'''
+        if all(_summarizes(self._expected, value) for value in self._values):
+            self._resolve_summary(cast(List[float], self._values))
+            return True
+        matcher = Matcher(self._expected)
+        pending = _distinct(value for value in self._values if not _QUIET_VALIDATOR.validate(value, matcher))
+        if not pending:
+            return False
+        known = [self._expected['value']] if self._has_old_value else cast(List[object], self._expected.get('anyof', []))
+        candidates = _distinct(known + pending)
+        kind = type(candidates[0])
+        keys = set(self._expected) - self._IGNORED_KEYS
+        if not all(type(candidate) is kind for candidate in candidates):
+            self._resolve_values(self._expected, pending)
+        elif kind in (dict, list) and keys == {'value'}:
+            self._resolve_all_paths(candidates)
+        elif 'paths' in self._expected:
+            self._update_paths(pending, self._resolved)
+        elif kind is str and keys <= self._STR_KEYS:
+            self._resolve_all_str(pending, candidates)
+        elif kind in (int, float) and keys <= self._NUMBER_KEYS and ('min' in keys) == ('max' in keys):
+            self._resolve_all_numbers(candidates)
+        else:
+            self._resolve_values(self._expected, pending)
+        return True
+
+    def _resolve_all_str(self, pending:List[object], candidates:List[object]) -> None:
+        if 'regex' in self._expected:
+            known = cast(List[str], self._expected.get('examples', []))
+            learned, gaps = self._learned_parts(known)
+            typed = self._examples.keeps_all() and substrings.has_typed_gaps(cast(str, self._expected['regex']))
+            values, examples = cast(List[str], pending), pending
+        else:
+            known, (learned, gaps), typed = [], ([cast(str, candidates[0])], None), True
+            values, examples = cast(List[str], candidates[1:]), candidates
+        parts = learned
+        gap_pattern = substrings.GapPattern(parts)
+        for value in values:
+            if not gap_pattern.match(value):  # Values that match already would not change the parts
+                parts = substrings.combine(parts, value)
+                gap_pattern = substrings.GapPattern(parts)
+        if parts == learned and gaps is not None:
+            pattern = substrings.generalize(parts, values, gaps)
+        elif typed:
+            pattern = substrings.generalize(parts, known + values if known else cast(List[str], candidates))
+        else:
+            pattern = substrings.regexpify(parts).pattern
+        if 'regex' not in self._expected and (len(candidates) <= 5 and not substrings.has_only_token_gaps(pattern) or not _meaningful(pattern)):
+            return self._resolve_all_with_anyof(candidates)
+        if not _meaningful(pattern):
+            return self._resolve_examples_with_anyof(pending)
+        self._expected.pop('value', None)
+        self._expected.pop('anyof', None)
+        self._expected['regex'] = pattern
+        self._examples.keep(self._expected, examples)
+        logger.console(f"Resolved with regex from {len(candidates)} values")
+
+    def _resolve_all_numbers(self, candidates:List[object]) -> None:
+        if 'min' not in self._expected and len(candidates) <= 5:
+            return self._resolve_all_with_anyof(candidates)
+        if self._tolerance and 'min' not in self._expected:
+            known = [self._expected['value']] if self._has_old_value else cast(List[object], self._expected.get('anyof', []))
+            return self._start_summary(cast(List[float], known + self._values))
+        numbers = cast(List[float], candidates + [self._expected[key] for key in ('min', 'max') if key in self._expected])
+        self._expected.pop('value', None)
+        self._expected.pop('anyof', None)
+        self._expected['min'] = min(numbers)
+        self._expected['max'] = max(numbers)
+        logger.console(f"Resolved with min {self._expected['min']} and max {self._expected['max']} from {len(candidates)} values")
+
+    def _resolve_all_with_anyof(self, candidates:List[object]) -> None:
+        self._expected.pop('value', None)
+        self._expected['anyof'] = candidates
+        logger.console(f"Resolved with anyof")
+
+    def _resolve_all_paths(self, candidates:List[object]) -> None:
+        collected, shapes = paths.collect(candidates)
+        if '$' in collected:
+            self._resolve_values(self._expected, candidates[1:])
+            return
+        del self._expected['value']
+        self._expected['paths'] = {**shapes, **{path:self._resolved({'value':values[0]}, values[1:]) for path, values in collected.items()}}
+        logger.console(f"Resolved with {len(collected)} paths from {len(candidates)} values")
+
+    def _resolved(self, expected:Dict[str, object], values:List[object]) -> Dict[str, object]:
+        if values:
+            BatchResolver(values, expected, self._examples).resolve()
+        return expected
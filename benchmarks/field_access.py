@@ -0,0 +1,30 @@
+'''Cost of validating two expected fields of an object with many expensive properties.
+
+Run with: PYTHONPATH=. python benchmarks/field_access.py
+'''
+import timeit
+from typing import Dict
+from Expects import Matcher, Validator, _Log
+
+PROPERTIES = [10, 100, 1000]
+PROPERTY_COST = 1000
+
+def response_type(properties:int) -> type:
+    def expensive(self) -> str:
+        return ''.join(str(i) for i in range(PROPERTY_COST))
+    attributes:Dict[str, object] = {f'prop{i}':property(expensive) for i in range(properties)}
+    attributes['status_code'] = 200
+    attributes['reason'] = 'OK'
+    return type('Response', (), attributes)
+
+def validation_cost(properties:int) -> float:
+    value = response_type(properties)()
+    matcher = Matcher({'fields':{'status_code':{'value':200}, 'reason':{'value':'OK'}}})
+    validator = Validator(_Log(lambda message: None))
+    assert validator.validate(value, matcher)
+    return min(timeit.repeat(lambda: validator.validate(value, matcher), number=10, repeat=3)) / 10
+
+if __name__ == '__main__':
+    print(f"{'properties':>10} {'us/validate':>12}")
+    for properties in PROPERTIES:
+        print(f"{properties:>10} {validation_cost(properties)*1e6:>12.1f}")
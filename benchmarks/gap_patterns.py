@@ -0,0 +1,38 @@
+'''Matching learned regexes with re and with substrings.GapPattern.
+
+Uses the HTML response regex and examples learned in atest/test_expects.json.
+Run with: PYTHONPATH=. python benchmarks/gap_patterns.py
+'''
+import json
+import os
+import re
+import timeit
+from Expects import substrings
+
+def html_expectation():
+    with open(os.path.join('atest', 'test_expects.json')) as f:
+        expectations = json.load(f)
+    return expectations['Tests']['Test 3'][0]['fields']['text']
+
+def per_call(func) -> float:
+    return min(timeit.repeat(func, number=1, repeat=3))
+
+def compare(name:str, pattern:str, value:str) -> None:
+    regex = re.compile(pattern)
+    gaps = substrings.compile_pattern(pattern)
+    assert isinstance(gaps, substrings.GapPattern)
+    assert bool(regex.match(value)) == gaps.match(value)
+    print(f"{name:<34} {len(value):>8} {per_call(lambda: regex.match(value))*1e3:>10.3f} "
+          f"{per_call(lambda: gaps.match(value))*1e3:>10.3f}")
+
+if __name__ == '__main__':
+    expected = html_expectation()
+    example = expected['examples'][0]
+    print(f"{'value':<34} {'chars':>8} {'re ms':>10} {'gaps ms':>10}")
+    compare('learned example', expected['regex'], example)
+    compare('learned example x 20', expected['regex'], example * 20)
+    # Backtracking grows with the number of gaps that can match the same line
+    parts = [part.replace('\n', ' ') for part in substrings.parse_regexpified(expected['regex']) or []]
+    one_line = substrings.regexpify(parts[:11] + ['', 'NOT THERE']).pattern
+    for repeat in [1, 2, 4, 8]:
+        compare(f'one line mismatch x {repeat}', one_line, example.replace('\n', ' ') * repeat)
@@ -0,0 +1,72 @@
+'''Import time of the library in a fresh interpreter with python -X importtime.
+
+Robot Framework is imported first as it is in a Robot run, so the numbers are what
+importing Expects adds to the start of every Robot process. The modules that are imported
+later when first used are reported separately, and the run fails if one of them is imported
+with Expects.
+
+Run with: PYTHONPATH=. python benchmarks/importtime.py [--runs N] [--max-ms MS]
+'''
+from typing import Dict, List, Tuple
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROBOT = 'import robot.api, robot.libraries.BuiltIn'
+LIBRARY = 'import Expects'
+# Modules that are imported only when first used
+LAZY = ['Expects.training', 'Expects.inspector', 'Expects.summary', 'Expects.timing', 'Expects.shards', 'Expects.shared',
+        'Expects.substrings', 'Expects.blobs', 'Expects.batch', 'Expects.digests', 'Expects.paths', 'Expects.journal']
+LATER = f"import {', '.join(LAZY)}"
+
+def imports(code:str) -> Dict[str, Tuple[int, int]]:
+    '''Self and cumulative microseconds of each module imported by code.'''
+    # Bytecode is written so that compiling the sources is not measured after the first run
+    env = {key:value for key, value in os.environ.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], check=True, env=env,
+                            stderr=subprocess.PIPE, universal_newlines=True).stderr
+    modules:Dict[str, Tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and 'self [us]' not in line:
+            own, cumulative, name = line[len('import time:'):].split('|')
+            modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+def added_imports(before:str, code:str, runs:int) -> Dict[str, Tuple[float, float]]:
+    '''Median self and cumulative microseconds of the modules code imports after before.'''
+    known = set(imports(before))
+    imports(f'{before}; {code}')
+    samples:Dict[str, List[Tuple[int, int]]] = {}
+    for _ in range(runs):
+        for name, times in imports(f'{before}; {code}').items():
+            if name not in known:
+                samples.setdefault(name, []).append(times)
+    return {name:(statistics.median(own for own, _ in values), statistics.median(cumulative for _, cumulative in values))
+            for name, values in samples.items()}
+
+def report(title:str, modules:Dict[str, Tuple[float, float]]) -> float:
+    total = sum(own for own, _ in modules.values())
+    print(f"{title}: {total / 1000:.1f} ms, {len(modules)} modules")
+    for name, (own, _) in sorted(modules.items(), key=lambda item: -item[1][0])[:15]:
+        print(f"  {own / 1000:>7.2f} ms  {name}")
+    return total / 1000
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Import time of Expects.')
+    parser.add_argument('--runs', type=int, default=9, help='fresh interpreters to take the median of, default 9')
+    parser.add_argument('--max-ms', type=float, help='fail when importing Expects takes longer than this')
+    args = parser.parse_args()
+    modules = added_imports(ROBOT, LIBRARY, args.runs)
+    library = report('import Expects', modules)
+    report('imported later when first used', added_imports(f'{ROBOT}; {LIBRARY}', LATER, args.runs))
+    found = [f"{name} is imported with Expects" for name in LAZY if name in modules]
+    if args.max_ms is not None and library > args.max_ms:
+        found.append(f"import Expects takes {library:.1f} ms, more than {args.max_ms} ms")
+    for regression in found:
+        print(f"REGRESSION {regression}")
+    return 1 if found else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+'''Listener overhead per keyword call, driving the listener methods directly without Robot.
+
+Run with: PYTHONPATH=. python benchmarks/listener.py
+'''
+import timeit
+from typing import Dict, List, Tuple
+from Expects import Expects
+
+LIBRARY_KEYWORD = {'libname':'BuiltIn', 'type':'Keyword'}
+USER_KEYWORD = {'libname':'', 'type':'Keyword'}
+TEST_END = {'longname':'Suite.Test'}
+KEYWORDS = 100000
+
+def events(depth:int) -> List[Tuple[str, str, Dict[str, str]]]:
+    '''A test calling library keywords nested depth levels deep in FOR loops and user keywords.'''
+    result:List[Tuple[str, str, Dict[str, str]]] = [('start_test', 'Test', {})]
+    calls = 0
+    while calls < KEYWORDS:
+        for level in range(depth):
+            attrs = USER_KEYWORD if level % 2 else LIBRARY_KEYWORD
+            result.append(('start_keyword', f'Keyword {level}', attrs))
+        result.append(('start_keyword', 'Log', LIBRARY_KEYWORD))
+        result.append(('end_keyword', 'Log', LIBRARY_KEYWORD))
+        for level in reversed(range(depth)):
+            attrs = USER_KEYWORD if level % 2 else LIBRARY_KEYWORD
+            result.append(('end_keyword', f'Keyword {level}', attrs))
+        calls += depth + 1
+    result.append(('end_test', 'Test', TEST_END))
+    return result
+
+def listener_cost(depth:int) -> float:
+    run_events = events(depth)
+    keywords = sum(1 for event, _, _ in run_events if event == 'start_keyword')
+    def run():
+        lib = Expects()
+        methods = {'start_test':lib._start_test, 'end_test':lib._end_test,
+                   'start_keyword':lib._start_keyword, 'end_keyword':lib._end_keyword}
+        for event, name, attrs in run_events:
+            methods[event](name, attrs)
+    return min(timeit.repeat(run, number=1, repeat=5)) / keywords
+
+if __name__ == '__main__':
+    print(f"{'depth':>5} {'ns/keyword':>10}")
+    for depth in [0, 2, 8]:
+        print(f"{depth:>5} {listener_cost(depth)*1e9:>10.1f}")
@@ -0,0 +1,24 @@
+'''Expectation lookup cost per check as the number of expectations in a test grows.
+
+Run with: PYTHONPATH=. python benchmarks/lookup.py
+'''
+import timeit
+from Expects import Expects, _index_by_id
+
+SIZES = [10, 100, 1000, 10000, 100000]
+LOOKUPS = 10000
+
+def lookup_cost(size:int) -> float:
+    lib = Expects()
+    expectations = [{'id':f'Test.{i}', 'value':i} for i in range(size)]
+    index = _index_by_id(expectations)
+    ids = [f'Test.{(i * 7919) % size}' for i in range(LOOKUPS)]
+    def run():
+        for expectation_id in ids:
+            lib._find_expected(expectation_id, expectations, index)
+    return min(timeit.repeat(run, number=1, repeat=5)) / LOOKUPS
+
+if __name__ == '__main__':
+    print(f"{'expectations':>12} {'ns/lookup':>10}")
+    for size in SIZES:
+        print(f"{size:>12} {lookup_cost(size)*1e9:>10.1f}")
@@ -0,0 +1,38 @@
+'''Scaling of substrings.find_matching_parts from 1 KB to 10 MB.
+
+Compares two HTML like documents that differ in a few generated ids, like two
+responses of the same page. Run with: PYTHONPATH=. python benchmarks/matching_parts.py
+'''
+import random
+import time
+from typing import List
+from Expects import substrings
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+DIFFERENCES = 10
+
+def document(size:int, rng:random.Random) -> str:
+    rows:List[str] = []
+    length = 0
+    while length < size:
+        row = f'<div class="row-{len(rows) % 7}" data-id="{rng.getrandbits(32):08x}">item {len(rows)}</div>\n'
+        rows.append(row)
+        length += len(row)
+    return ''.join(rows)[:size]
+
+def changed(text:str, rng:random.Random) -> str:
+    chars = list(text)
+    for _ in range(DIFFERENCES):
+        i = rng.randrange(len(chars))
+        chars[i:i+8] = f'{rng.getrandbits(32):08x}'
+    return ''.join(chars)
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+    print(f"{'size':>10} {'parts':>6} {'seconds':>9}")
+    for size in SIZES:
+        first = document(size, rng)
+        second = changed(first, rng)
+        start = time.perf_counter()
+        parts = substrings.find_matching_parts(first, second)
+        print(f"{size:>10} {len(parts):>6} {time.perf_counter() - start:>9.3f}")
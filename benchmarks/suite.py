@@ -0,0 +1,402 @@
+'''Offline benchmark suite for the hot paths of Expects with generated workloads.
+
+Every case runs in a process of its own and reports operations per second and
+the peak RSS of that process. Results can be saved as a baseline and later runs
+compared against it. The run fails when a case is slower or uses more memory
+than the baseline allows.
+
+Run with: PYTHONPATH=. python benchmarks/suite.py [-k name] [--save FILE] [--compare FILE]
+and benchmarks/importtime.py for the import time of a fresh interpreter.
+
+--smoke runs the quick cases briefly and times checks in a real Robot run, where Robot
+variables and logging are live, against the same checks without Robot. run_tests.sh runs it
+to see that the cases still work, only regressions against a baseline and --max-overhead fail it.
+'''
+from typing import Callable, Dict, List, Optional, cast
+import argparse
+import atexit
+import compileall
+import functools
+import importlib
+import json
+import os
+import random
+import resource
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from Expects import Expects, Matcher, Validator, _Log, _write_json_atomically, substrings
+from Expects import diffs
+from Expects import shared as shared_module
+from Expects.digests import ValueDigest
+from Expects.summary import NumberSummary
+
+Operation = Callable[[], object]
+CASES:Dict[str, Callable[[], Operation]] = {}
+MIN_TIME = 0.2
+SMOKE_MIN_TIME = 0.02
+# Cases that set up in well under a second
+SMOKE = ['listener.keyword', 'check.normal.str', 'check.normal.number', 'check.normal.regex', 'check.training.widen',
+         'rule.value', 'rule.anyof', 'rule.regex.typed', 'rule.minmax', 'rule.fields', 'rule.paths',
+         'substrings.1KB', 'substrings.generalize', 'json.load.1KB', 'json.save.1KB']
+ROBOT_CHECKS = 5000
+
+def case(name:str) -> Callable[[Callable[[], Operation]], Callable[[], Operation]]:
+    def register(setup:Callable[[], Operation]) -> Callable[[], Operation]:
+        CASES[name] = setup
+        return setup
+    return register
+
+def _text(size:int, seed:int=0) -> str:
+    rnd = random.Random(seed)
+    return ''.join(rnd.choice(string.ascii_letters + ' \n') for _ in range(size))
+
+def _mutated(text:str, changes:int, seed:int=1) -> str:
+    rnd = random.Random(seed)
+    chars = list(text)
+    for _ in range(changes):
+        chars[rnd.randrange(len(chars))] = rnd.choice(string.digits)
+    return ''.join(chars)
+
+def _workdir() -> str:
+    workdir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, workdir, True)
+    return workdir
+
+def _library(mode:str) -> Expects:
+    workdir = _workdir()
+    lib = Expects(mode)
+    lib._start_suite('Suite', {'source':os.path.join(workdir, 'suite.robot')})
+    lib._start_test('Test', {})
+    return lib
+
+def _expectations(size:int) -> Dict[str, object]:
+    '''Expectations file content of about size bytes.'''
+    rnd = random.Random(0)
+    tests:Dict[str, List[Dict[str, object]]] = {}
+    written = 0
+    while written < size:
+        name = f'Test {len(tests)}'
+        exps:List[Dict[str, object]] = [{'id':f'{name}.{i}', 'value':_text(rnd.randint(10, 200), i)} for i in range(10)]
+        exps.append({'id':f'{name}.num', 'min':rnd.random(), 'max':rnd.random() + 1})
+        tests[name] = exps
+        written += len(json.dumps(exps, indent=2))
+    return {'Tests':tests, 'Keywords':{}}
+
+@case('import.library')
+def import_library() -> Operation:
+    '''Executing the modules of the package, from bytecode. See importtime.py for a whole import.'''
+    package = os.path.dirname(str(sys.modules['Expects'].__file__))
+    compileall.compile_dir(package, quiet=1)
+    def run():
+        for name in [name for name in sys.modules if name == 'Expects' or name.startswith('Expects.')]:
+            del sys.modules[name]
+        return importlib.import_module('Expects')
+    return run
+
+@case('listener.keyword')
+def listener_keyword() -> Operation:
+    lib = _library('NORMAL')
+    attrs = {'libname':'BuiltIn', 'type':'Keyword'}
+    def run():
+        lib._start_keyword('Log', attrs)
+        lib._end_keyword('Log', attrs)
+    return run
+
+def _check(mode:str, value:object, values:Optional[List[object]]=None) -> Operation:
+    lib = _library('TRAINING')
+    for trained in values or [value]:
+        lib.should_be_as_expected(trained, id='check')
+    lib._mode = mode
+    return lambda: lib.should_be_as_expected(value, id='check')
+
+@case('check.normal.str')
+def check_normal_str() -> Operation:
+    return _check('NORMAL', 'some response text')
+
+@case('check.normal.number')
+def check_normal_number() -> Operation:
+    return _check('NORMAL', 42)
+
+@case('check.normal.regex')
+def check_normal_regex() -> Operation:
+    values:List[object] = [f'<html>session={i * 37}-abc</html>' for i in range(7)]
+    return _check('NORMAL', '<html>session=999-abc</html>', values)
+
+@case('check.training.new')
+def check_training_new() -> Operation:
+    lib = _library('TRAINING')
+    ids = (f'id{i}' for i in range(10**9))
+    return lambda: lib.should_be_as_expected('new value', id=next(ids))
+
+@case('check.training.widen')
+def check_training_widen() -> Operation:
+    lib = _library('TRAINING')
+    values = iter(range(10**9))
+    return lambda: lib.should_be_as_expected(next(values), id='widen')
+
+def _rule(expected:Dict[str, object], value:object) -> Operation:
+    matcher = Matcher(expected)
+    validator = Validator(_Log(lambda message: None))
+    assert validator.validate(value, matcher)
+    return lambda: validator.validate(value, matcher)
+
+@case('rule.value')
+def rule_value() -> Operation:
+    return _rule({'value':'expected'}, 'expected')
+
+@case('rule.anyof')
+def rule_anyof() -> Operation:
+    return _rule({'anyof':['a', 'b', 'c', 'd', 'e']}, 'e')
+
+@case('rule.startswith')
+def rule_startswith() -> Operation:
+    return _rule({'startswith':'<html>'}, '<html>' + _text(1000))
+
+@case('rule.regex.learned')
+def rule_regex_learned() -> Operation:
+    value = _text(10000).replace('\n', ' ')
+    return _rule({'regex':substrings.regexpify([value[:100], '', value[5000:5100], '', value[-100:]]).pattern}, value)
+
+@case('rule.regex.custom')
+def rule_regex_custom() -> Operation:
+    return _rule({'regex':r'^[a-zA-Z \n]+$'}, _text(10000))
+
+@case('rule.regex.typed')
+def rule_regex_typed() -> Operation:
+    return _rule({'regex':r'^sid=[0-9a-f]{32};\ expires=\d{4}\-\d{2}\-\d{2}T\d{2}:\d{2}:\d{2}Z$'},
+                 'sid=3f2a9c01d4e5f60718293a4b5c6d7e8f; expires=2026-10-18T09:16:42Z')
+
+@case('rule.minmax')
+def rule_minmax() -> Operation:
+    return _rule({'min':0, 'max':100}, 50)
+
+@case('rule.band')
+def rule_band() -> Operation:
+    rnd = random.Random(0)
+    numbers = NumberSummary.of(rnd.gauss(100, 5) for _ in range(100000))
+    return _rule({'stats':numbers.to_json(), 'band':'p1-p99'}, 100)
+
+@case('rule.fields')
+def rule_fields() -> Operation:
+    value = type('Response', (), {'status_code':200, 'reason':'OK', 'text':property(lambda self: _text(1000))})()
+    return _rule({'fields':{'status_code':{'value':200}, 'reason':{'value':'OK'}}}, value)
+
+@case('rule.paths')
+def rule_paths() -> Operation:
+    value = {'items':[{'id':i, 'name':f'item {i}'} for i in range(100)]}
+    return _rule({'paths':{'$.items[*].id':{'min':0, 'max':99}, '$.items[*].name':{'regex':'^item .*$'}}}, value)
+
+@case('rule.digest')
+def rule_digest() -> Operation:
+    value = _text(1000000).encode()
+    digest = ValueDigest.of(value)
+    return _rule({'size':digest.size, 'sha256':digest.sha256}, value)
+
+def _matching_parts(size:int) -> Operation:
+    text = _text(size)
+    changed = _mutated(text, max(1, size // 1000))
+    return lambda: substrings.find_matching_parts(text, changed)
+
+@case('substrings.1KB')
+def substrings_1kb() -> Operation:
+    return _matching_parts(1000)
+
+@case('substrings.100KB')
+def substrings_100kb() -> Operation:
+    return _matching_parts(100000)
+
+@case('substrings.1MB')
+def substrings_1mb() -> Operation:
+    return _matching_parts(1000000)
+
+@case('substrings.generalize')
+def substrings_generalize() -> Operation:
+    rnd = random.Random(0)
+    def record() -> str:
+        return ' '.join(f'{rnd.randrange(2020, 2030)}-{rnd.randrange(1, 13):02d}-{rnd.randrange(1, 29):02d} id={rnd.getrandbits(128):032x} '
+                        f'count={rnd.randrange(10**6)} status=OK' for _ in range(10))
+    values = [record(), record()]
+    parts = substrings.find_matching_parts(*values)
+    return lambda: substrings.generalize(parts, values)
+
+@case('diff.first_hunk.1MB')
+def diff_first_hunk_1mb() -> Operation:
+    text = _text(1000000)
+    changed = _mutated(text, 10)
+    def run():
+        prefix = diffs.common_prefix(text, changed)
+        return next(diffs.hunks(text, changed, prefix, diffs.common_suffix(text, changed, prefix)))
+    return run
+
+def _json_file(size:int) -> str:
+    path = os.path.join(_workdir(), 'suite_expects.json')
+    _write_json_atomically(path, _expectations(size), False)
+    return path
+
+def _json_load(size:int) -> Operation:
+    path = _json_file(size)
+    def run():
+        with open(path) as f:
+            return json.load(f)
+    return run
+
+def _json_save(size:int) -> Operation:
+    path = _json_file(size)
+    with open(path) as f:
+        data = json.load(f)
+    return lambda: _write_json_atomically(path, data, False)
+
+for _size, _label in [(1000, '1KB'), (1000000, '1MB'), (100000000, '100MB')]:
+    case(f'json.load.{_label}')(functools.partial(_json_load, _size))
+    case(f'json.save.{_label}')(functools.partial(_json_save, _size))
+
+def _suite_start(size:int, shared:bool) -> Operation:
+    '''Start of a suite that checks one of the keywords of about size bytes of keyword expectations.'''
+    workdir = _workdir()
+    keywords:Dict[str, List[Dict[str, object]]] = {
+        name.replace('Test', 'Keyword'):[dict(exp, id=str(exp['id']).replace('Test', 'Keyword')) for exp in exps]
+        for name, exps in cast(Dict[str, List[Dict[str, object]]], _expectations(size)['Tests']).items()}
+    source = os.path.join(workdir, 'suite.robot')
+    attrs = {'kwname':'Keyword 0', 'libname':'common' if shared else '', 'type':'Keyword'}
+    options = {'shared_keywords':os.path.join(workdir, 'shared')} if shared else {}
+    if shared:
+        store = shared_module.SharedKeywords(options['shared_keywords'], lambda path, data: _write_json_atomically(path, data, False))
+        for name, exps in keywords.items():
+            store.get('common', name)[0].extend(exps)
+            store.changed('common', name)
+        store.save()
+    _write_json_atomically(os.path.join(workdir, 'suite_expects.json'), {'Tests':{}, 'Keywords':{} if shared else keywords}, False)
+    value = keywords['Keyword 0'][0]['value']
+    def run():
+        lib = Expects('NORMAL', **options)
+        lib._resources['common'] = 'common'
+        lib._start_suite('Suite', {'source':source})
+        lib._start_test('Test', {})
+        lib._start_keyword(f"{attrs['libname']}.Keyword 0".lstrip('.'), attrs)
+        lib.should_be_as_expected(value, id='Keyword 0.0')
+    return run
+
+case('suite.start.keywords_1MB')(functools.partial(_suite_start, 1000000, False))
+case('suite.start.shared_1MB')(functools.partial(_suite_start, 1000000, True))
+
+def measure(operation:Operation, min_time:float=MIN_TIME) -> float:
+    '''Operations per second of the best of three rounds of at least min_time each.'''
+    best = 0.0
+    for _ in range(3):
+        count, start = 0, time.perf_counter()
+        while True:
+            operation()
+            count += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, count / elapsed)
+    return best
+
+def run_case(name:str, min_time:float=MIN_TIME) -> Dict[str, float]:
+    operation = CASES[name]()
+    ops = measure(operation, min_time)
+    return {'ops_per_s':ops, 'peak_rss_mb':resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+def run_in_process(name:str, min_time:float=MIN_TIME) -> Dict[str, float]:
+    output = subprocess.run([sys.executable, __file__, '--case', name, '--min-time', str(min_time)], check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+_ROBOT_SUITE = '''*** Settings ***
+Library    Expects
+Library    timer.py
+
+*** Test Cases ***
+Checks
+    ${seconds}=    Time Checks    %(checks)d
+    Set Suite Metadata    seconds    ${seconds}
+'''
+
+_ROBOT_TIMER = '''import time
+from robot.libraries.BuiltIn import BuiltIn
+
+def time_checks(count):
+    library = BuiltIn().get_library_instance('Expects')
+    library.should_be_as_expected('value', id='check', training=True)
+    start = time.perf_counter()
+    for _ in range(int(count)):
+        library.should_be_as_expected('value', id='check')
+    return (time.perf_counter() - start) / int(count)
+'''
+
+def robot_check_time(checks:int=ROBOT_CHECKS) -> float:
+    '''Seconds per passing check of the library in a Robot run that writes output.xml, best of two runs.
+    Shows costs that the cases above miss because Robot is not running there.'''
+    from robot.api import ExecutionResult # type: ignore
+    workdir = _workdir()
+    for name, content in [('overhead.robot', _ROBOT_SUITE % {'checks':checks}), ('timer.py', _ROBOT_TIMER)]:
+        with open(os.path.join(workdir, name), 'w') as f:
+            f.write(content)
+    output = os.path.join(workdir, 'output.xml')
+    best = float('inf')
+    for _ in range(2):
+        subprocess.run([sys.executable, '-m', 'robot', '--output', output, '--log', 'NONE', '--report', 'NONE',
+                        os.path.join(workdir, 'overhead.robot')], check=True, stdout=subprocess.DEVNULL)
+        best = min(best, float(ExecutionResult(output).suite.metadata['seconds']))
+    return best
+
+def regressions(results:Dict[str, Dict[str, float]], baseline:Dict[str, Dict[str, float]], tolerance:float) -> List[str]:
+    found:List[str] = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        if result['ops_per_s'] < baseline[name]['ops_per_s'] * (1 - tolerance):
+            found.append(f"{name}: {result['ops_per_s']:.1f} ops/s, baseline {baseline[name]['ops_per_s']:.1f}")
+        if result['peak_rss_mb'] > baseline[name]['peak_rss_mb'] * (1 + tolerance):
+            found.append(f"{name}: {result['peak_rss_mb']:.1f} MB peak RSS, baseline {baseline[name]['peak_rss_mb']:.1f}")
+    return found
+
+def main(argv:Optional[List[str]]=None) -> int:
+    parser = argparse.ArgumentParser(description='Offline benchmarks for Expects hot paths.')
+    parser.add_argument('-k', dest='keyword', default='', help='run only cases with this in their name')
+    parser.add_argument('--save', help='save results as a baseline to this file')
+    parser.add_argument('--compare', help='compare results to the baseline in this file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression, default 0.25')
+    parser.add_argument('--smoke', action='store_true', help='run the quick cases briefly and the Robot run overhead')
+    # Logging to output.xml makes the overhead about 4, a BuiltIn variable lookup per check about 12
+    parser.add_argument('--max-overhead', type=float,
+                        help='with --smoke fail when a check takes more than this many times as long in a Robot run')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    parser.add_argument('--min-time', type=float, default=MIN_TIME, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.case:
+        print(json.dumps(run_case(args.case, args.min_time)))
+        return 0
+    baseline:Dict[str, Dict[str, float]] = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    results:Dict[str, Dict[str, float]] = {}
+    print(f"{'case':<24} {'ops/s':>14} {'peak RSS MB':>12} {'baseline ops/s':>15}")
+    for name in CASES:
+        if args.keyword not in name or (args.smoke and name not in SMOKE):
+            continue
+        result = results[name] = run_in_process(name, SMOKE_MIN_TIME if args.smoke else MIN_TIME)
+        reference = f"{baseline[name]['ops_per_s']:>15.1f}" if name in baseline else ''
+        print(f"{name:<24} {result['ops_per_s']:>14.1f} {result['peak_rss_mb']:>12.1f} {reference}", flush=True)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    found = regressions(results, baseline, args.tolerance)
+    if args.smoke:
+        plain = 1 / (results.get('check.normal.str') or run_in_process('check.normal.str', SMOKE_MIN_TIME))['ops_per_s']
+        overhead = robot_check_time() / plain
+        print(f"A check takes {overhead:.1f} times as long in a Robot run as without Robot")
+        if args.max_overhead is not None and overhead > args.max_overhead:
+            found.append(f"check in a Robot run: {overhead:.1f} times as long as without Robot, at most {args.max_overhead} allowed")
+    for regression in found:
+        print(f"REGRESSION {regression}")
+    return 1 if found else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+'''Suite teardown cost of persisting an expectations file.
+
+Run with: PYTHONPATH=. python benchmarks/teardown.py [expects.json]
+'''
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from Expects import Expects
+
+def teardown_cost(source:str, dirty:bool, compact:bool) -> float:
+    workdir = tempfile.mkdtemp()
+    try:
+        suite = os.path.join(workdir, 'suite.robot')
+        shutil.copy(source, os.path.join(workdir, 'suite_expects.json'))
+        lib = Expects(compact=compact)
+        lib._start_suite('Suite', {'source':suite})
+        def run():
+            lib._dirty = dirty
+            lib._end_suite('Suite', {})
+        return min(timeit.repeat(run, number=10, repeat=5)) / 10
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join('atest', 'test_expects.json')
+    print(f"{source} ({os.path.getsize(source)} bytes)")
+    print(f"unchanged:          {teardown_cost(source, False, False)*1e3:8.3f} ms")
+    print(f"changed, indented:  {teardown_cost(source, True, False)*1e3:8.3f} ms")
+    print(f"changed, compact:   {teardown_cost(source, True, True)*1e3:8.3f} ms")
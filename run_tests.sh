@@ -1,4 +1,6 @@
 #!/bin/sh
 set -e
 mypy .
+PYTHONPATH=. python benchmarks/importtime.py --runs 3
+PYTHONPATH=. python benchmarks/suite.py --smoke
 PYTHONPATH=. robot atest/
@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 
-from distutils.core import setup
-from setuptools import find_packages # type: ignore
+from setuptools import setup, find_packages # type: ignore
 from os.path import abspath, join, dirname
 
 name = 'Mikko Korpela'
@@ -23,12 +22,18 @@ setup(name='robotframework-expects',
       author_email=address,
       url='https://github.com/mkorpela/robotframework-expects',
       packages=find_packages(),
+      entry_points={'console_scripts': ['expects-merge=Expects.merge:main', 'expects-train=Expects.merge:train',
+                                        'expects-shards=Expects.convert:main']},
+      python_requires='>=3.7',
       license='Apache License, Version 2.0',
       keywords=['testing'],
       classifiers=[
           'Intended Audience :: Developers',
           'Natural Language :: English',
-          'Programming Language :: Python :: 3.6',
-          'Programming Language :: Python :: 3.7'
+          'Programming Language :: Python :: 3.7',
+          'Programming Language :: Python :: 3.8',
+          'Programming Language :: Python :: 3.9',
+          'Programming Language :: Python :: 3.10',
+          'Programming Language :: Python :: 3.11'
           ]
       )